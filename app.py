@@ -1,13 +1,38 @@
 import streamlit as st
 import requests
-import google.generativeai as genai
-from textblob import TextBlob
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 import json
+import csv
+import random
+import codecs
+import re
 import pickle
+import hashlib
+import hmac
+import inspect
+import atexit
+from collections import OrderedDict
+from difflib import SequenceMatcher
 from pathlib import Path
 import os
+import sqlite3
+import threading
+import multiprocessing
+import shutil
+import tempfile
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed, wait
+)
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain, islice
+from bisect import bisect_left
 from dotenv import load_dotenv
+from blog_log import BlogLog
+from glossary import GlossaryStore, PopularityCounter
+from sentiment import SentimentLexicon
 
 load_dotenv()
 # Page Configuration
@@ -22,64 +47,426 @@ st.set_page_config(
 # API CONFIGURATION
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")  # unset: the Admin tab's bulk actions are disabled
 
 if not NEWS_API_KEY or not GEMINI_API_KEY:
     raise RuntimeError("API keys not found")
 
 print("✅ API keys loaded successfully")
-# Configure Gemini - Using latest Gemini 2.5 Flash for best performance
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel("gemini-2.5-flash")  # Fast and reliable model
+# Using latest Gemini 2.5 Flash for best performance
+GEMINI_MODEL_NAME = "gemini-2.5-flash"  # Fast and reliable model
+
+@st.cache_resource
+def get_model():
+    """Gemini client, created on first use so that pages which never call
+    Gemini don't pay for importing and configuring the SDK on load"""
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel(GEMINI_MODEL_NAME)
 
 # ============================================
 # LOCAL STORAGE FUNCTIONS
 # ============================================
 STORAGE_DIR = Path("finance_app_data")
 STORAGE_DIR.mkdir(exist_ok=True)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "file")  # "file" or "sqlite"
+
+class FileStore:
+    """Default backend: append-only blog log and pickled summaries"""
+
+    def __init__(self, root):
+        self.blog_log = BlogLog(root / "blogs.log", legacy_path=root / "blogs.pkl")
+        self.summaries_path = root / "summaries.pkl"
+        self._summaries_lock = threading.Lock()
+
+    def save_blogs(self, blogs):
+        self.blog_log.rewrite(blogs)
+
+    def append_blogs(self, blogs):
+        self.blog_log.append(blogs)
+
+    def load_blogs(self):
+        blogs = list(self.blog_log.iter_latest())
+        blogs.reverse()
+        return blogs
+
+    def save_summaries(self, summaries):
+        with open(self.summaries_path, "wb") as f:
+            pickle.dump(summaries, f)
+
+    def append_summary(self, summary):
+        with self._summaries_lock:
+            self.save_summaries(self.load_summaries() + [summary])
+
+    def load_summaries(self):
+        if not self.summaries_path.exists():
+            return []
+        with open(self.summaries_path, "rb") as f:
+            return pickle.load(f)
+
+class SQLiteStore:
+    """SQLite backend (WAL mode): each save touches only the rows it changes"""
+    # table -> (time column, filter column); the full record is pickled into `data`
+    TABLES = {
+        "blogs": ("time", "tag"),
+        "summaries": ("timestamp", "type"),
+    }
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS blogs (
+        id INTEGER PRIMARY KEY,
+        time TEXT NOT NULL,
+        tag TEXT,
+        data BLOB NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_blogs_time ON blogs(time);
+    CREATE INDEX IF NOT EXISTS idx_blogs_tag ON blogs(tag);
+    CREATE TABLE IF NOT EXISTS summaries (
+        id INTEGER PRIMARY KEY,
+        timestamp TEXT NOT NULL,
+        type TEXT,
+        data BLOB NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_summaries_timestamp ON summaries(timestamp);
+    CREATE INDEX IF NOT EXISTS idx_summaries_type ON summaries(type);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self):
+        # sqlite3 connections can't be shared across threads, and Streamlit
+        # runs each session on its own thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _put(self, table, records, replace_all=False):
+        time_col, key_col = self.TABLES[table]
+        rows = [
+            (r['id'], r[time_col].isoformat(timespec="microseconds"), r.get(key_col),
+             pickle.dumps(r, protocol=pickle.HIGHEST_PROTOCOL))
+            for r in records
+        ]
+        conn = self._conn()
+        with conn:
+            if replace_all:
+                conn.execute(f"DELETE FROM {table}")
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {table} (id, {time_col}, {key_col}, data) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def _get(self, table):
+        time_col, _ = self.TABLES[table]
+        sql = f"SELECT data FROM {table} ORDER BY {time_col}, id"
+        return [pickle.loads(row[0]) for row in self._conn().execute(sql)]
+
+    def _count(self, table):
+        return self._conn().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def save_blogs(self, blogs):
+        self._put("blogs", blogs, replace_all=True)
+
+    def append_blogs(self, blogs):
+        self._put("blogs", blogs)
+
+    def load_blogs(self):
+        return self._get("blogs")
+
+    def count_blogs(self):
+        return self._count("blogs")
+
+    def save_summaries(self, summaries):
+        self._put("summaries", summaries, replace_all=True)
+
+    def append_summary(self, summary):
+        self._put("summaries", [summary])
+
+    def load_summaries(self):
+        return self._get("summaries")
+
+    def count_summaries(self):
+        return self._count("summaries")
+
+@st.cache_resource
+def get_store():
+    """Storage backend shared by all sessions, selected with STORAGE_BACKEND"""
+    if STORAGE_BACKEND == "sqlite":
+        store = SQLiteStore(STORAGE_DIR / "finance.db")
+        if not store.count_blogs() and not store.count_summaries():
+            legacy = FileStore(STORAGE_DIR)
+            store.save_blogs(legacy.load_blogs())
+            store.save_summaries(legacy.load_summaries())
+        return store
+    return FileStore(STORAGE_DIR)
 
 def save_blogs(blogs):
     """Save blogs to local storage"""
-    with open(STORAGE_DIR / "blogs.pkl", "wb") as f:
-        pickle.dump(blogs, f)
+    get_store().save_blogs(blogs)
+
+def append_blogs(blogs):
+    """Append new or updated blogs to local storage"""
+    get_store().append_blogs(blogs)
 
 def load_blogs():
-    """Load blogs from local storage"""
-    file_path = STORAGE_DIR / "blogs.pkl"
-    if file_path.exists():
-        with open(file_path, "rb") as f:
-            return pickle.load(f)
-    return []
+    """Load blogs from local storage, oldest first"""
+    return get_store().load_blogs()
 
 def save_summaries(summaries):
     """Save document summaries to local storage"""
-    with open(STORAGE_DIR / "summaries.pkl", "wb") as f:
-        pickle.dump(summaries, f)
+    get_store().save_summaries(summaries)
+
+def append_summary(summary):
+    """Append a single document summary to local storage"""
+    get_store().append_summary(summary)
 
 def load_summaries():
-    """Load document summaries from local storage"""
-    file_path = STORAGE_DIR / "summaries.pkl"
-    if file_path.exists():
-        with open(file_path, "rb") as f:
-            return pickle.load(f)
-    return []
+    """Load document summaries from local storage, oldest first"""
+    return get_store().load_summaries()
+
+# ============================================
+# SHARED CORPUS
+# ============================================
+class Corpus:
+    """Blogs and summaries loaded once per process and shared by all sessions.
+
+    Readers hold immutable tuples; writers build a new tuple under the lock
+    (copy-on-write), so every session sees new posts on its next rerun
+    without going back to disk.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.blogs = tuple(sorted(load_blogs(), key=lambda b: b['id']))
+        self.summaries = tuple(sorted(load_summaries(), key=lambda s: s['id']))
+        self._next_blog_id = max((b['id'] for b in self.blogs), default=0) + 1
+        self._next_summary_id = max((s['id'] for s in self.summaries), default=0) + 1
+
+    def add_blog(self, blog):
+        """Assign the next id, persist and publish a blog"""
+        return self.add_blogs([blog])[0]
+
+    def add_blogs(self, blogs):
+        """Assign ids to, persist (in one write) and publish several blogs"""
+        with self._lock:
+            blogs = [dict(blog, id=self._next_blog_id + i) for i, blog in enumerate(blogs)]
+            if blogs:
+                append_blogs(blogs)
+                self.blogs = self.blogs + tuple(blogs)
+                self._next_blog_id += len(blogs)
+        return blogs
+
+    def update_blogs(self, updates):
+        """Apply {id: {field: value}} to existing blogs and persist them in one write"""
+        with self._lock:
+            blogs = tuple(dict(b, **updates[b['id']]) if b['id'] in updates else b for b in self.blogs)
+            save_blogs(blogs)
+            self.blogs = blogs
+
+    def add_summary(self, summary):
+        """Assign the next id, persist and publish a document summary"""
+        with self._lock:
+            summary = dict(summary, id=self._next_summary_id)
+            append_summary(summary)
+            self.summaries = self.summaries + (summary,)
+            self._next_summary_id += 1
+        return summary
+
+    @staticmethod
+    def page(records, before=None, limit=10):
+        """Newest-first page of id-ordered `records` with ids below the `before` cursor"""
+        end = len(records) if before is None else bisect_left(records, before, key=lambda r: r['id'])
+        return records[max(0, end - limit):end][::-1]
+
+@st.cache_resource
+def get_corpus():
+    return Corpus()
+
+corpus = get_corpus()
 
 # ============================================
-# INITIALIZE SESSION STATE
+# GEMINI RESPONSE CACHE
 # ============================================
-if 'blogs' not in st.session_state:
-    st.session_state.blogs = load_blogs()
-if 'blog_counter' not in st.session_state:
-    st.session_state.blog_counter = len(st.session_state.blogs) + 1
-if 'summaries' not in st.session_state:
-    st.session_state.summaries = load_summaries()
-if 'summary_counter' not in st.session_state:
-    st.session_state.summary_counter = len(st.session_state.summaries) + 1
+CHARS_PER_TOKEN = 4  # rough estimate for English text
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))  # max cached responses
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))  # seconds
+LLM_CACHE_PERSIST = os.getenv("LLM_CACHE_PERSIST", "false").lower() in ("1", "true", "yes")
+
+class LLMCache:
+    """Thread-safe LRU cache of Gemini response text with a TTL.
+
+    Keys are a hash of model name + prompt. When `path` is set, entries are
+    written to disk at most every `save_interval` seconds and on exit, and
+    reloaded on start.
+    """
+
+    def __init__(self, max_size, ttl, path=None, save_interval=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.save_interval = save_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, text), oldest first
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._last_save = time.time()
+        if path is not None:
+            self._load()
+            atexit.register(self.save)
+
+    @staticmethod
+    def key(model_name, prompt, generation_config=None):
+        config = json.dumps(generation_config, sort_keys=True) if generation_config else ""
+        return hashlib.sha256(f"{model_name}\0{prompt}\0{config}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, text):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            due = self.path is not None and time.time() - self._last_save >= self.save_interval
+            if due:
+                self._last_save = time.time()  # claim this save so other writers skip it
+        if due:
+            self.save()
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def save(self):
+        if self.path is None:
+            return
+        # One save at a time: concurrent saves would share the temp file
+        with self._save_lock:
+            with self._lock:
+                entries = list(self._entries.items())
+                self._last_save = time.time()
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump(entries, f)
+            os.replace(tmp, self.path)
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "rb") as f:
+                entries = pickle.load(f)
+        except Exception:
+            return
+        now = time.time()
+        for key, (expires_at, text) in entries[-self.max_size:]:
+            if expires_at > now:
+                self._entries[key] = (expires_at, text)
+
+@st.cache_resource
+def get_llm_cache():
+    path = STORAGE_DIR / "llm_cache.pkl" if LLM_CACHE_PERSIST else None
+    return LLMCache(LLM_CACHE_SIZE, LLM_CACHE_TTL, path)
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one: the first
+    caller runs the function, later callers wait for and share its result
+    (or exception)."""
+
+    def __init__(self):
+        self.shared = 0  # calls answered by another caller's request
+        self._calls = {}  # key -> Future of the in-flight call
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+@st.cache_resource
+def get_single_flight():
+    return SingleFlight()
+
+def generate_text(prompt, generation_config=None, timeout=None):
+    """Text of model.generate_content(prompt), served from the shared cache when possible.
+
+    Identical prompts already in flight in any session are awaited rather
+    than sent again. `timeout` (seconds) bounds the request itself, so a
+    caller that gives up doesn't leave it holding a worker thread.
+    """
+    cache = get_llm_cache()
+    key = cache.key(GEMINI_MODEL_NAME, prompt, generation_config)
+    text = cache.get(key)
+    if text is None:
+        def request():
+            request_options = {"timeout": timeout} if timeout else None
+            text = get_model().generate_content(
+                prompt, generation_config=generation_config, request_options=request_options
+            ).text
+            cache.put(key, text)
+            return text
+        text = get_single_flight().do(key, request)
+    return text
+
+def forget_text(prompt, generation_config=None):
+    """Drop a cached response the caller couldn't use, so the next request asks Gemini again"""
+    get_llm_cache().discard(get_llm_cache().key(GEMINI_MODEL_NAME, prompt, generation_config))
+
+def stream_text(prompt):
+    """Yield model output as it is generated; the full text is cached once the stream completes"""
+    cache = get_llm_cache()
+    key = cache.key(GEMINI_MODEL_NAME, prompt)
+    text = cache.get(key)
+    if text is not None:
+        yield text
+        return
+    parts = []
+    for chunk in get_model().generate_content(prompt, stream=True):
+        parts.append(chunk.text)
+        yield chunk.text
+    cache.put(key, "".join(parts))
 
 # ============================================
 # BLOG RATING FUNCTIONS
 # ============================================
-def rate_with_textblob(content):
-    polarity = TextBlob(content).sentiment.polarity
+@st.cache_resource
+def get_sentiment_lexicon():
+    return SentimentLexicon.from_pattern()
+
+def polarity_to_rating(polarity):
     if polarity <= -0.6:
         return 1
     elif polarity <= -0.2:
@@ -91,6 +478,13 @@ def rate_with_textblob(content):
     else:
         return 5
 
+def rate_with_textblob(content):
+    return polarity_to_rating(get_sentiment_lexicon().polarity(content))
+
+def rate_with_textblob_batch(contents):
+    """Lexicon ratings for several blogs, as a list aligned with `contents`"""
+    return [polarity_to_rating(p) for p in get_sentiment_lexicon().polarities(contents)]
+
 def rate_with_gemini(content):
     prompt = (
         "You are an expert finance content reviewer.\n"
@@ -101,59 +495,317 @@ def rate_with_gemini(content):
         f"Content:\n{content}"
     )
     try:
-        res = model.generate_content(prompt)
-        return int(res.text.strip())
+        return int(generate_text(prompt, timeout=GEMINI_RATING_TIMEOUT).strip())
     except:
         return None
 
+# Latency budget (seconds) for the Gemini score, measured from when rating starts
+GEMINI_RATING_TIMEOUT = float(os.getenv("GEMINI_RATING_TIMEOUT", "8"))
+
+@st.cache_resource
+def get_rating_pool():
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="rating")
+
+@st.cache_resource
+def get_bulk_rating_pool():
+    return ThreadPoolExecutor(max_workers=RATING_BULK_CONCURRENCY, thread_name_prefix="bulk_rating")
+
 def rate_blog(content):
-    gemini_rating = rate_with_gemini(content)
-    blob_rating = rate_with_textblob(content)
-    if gemini_rating:
+    """Run both scorers concurrently and return (rating, source).
+
+    Gemini runs on the rating pool while the local lexicon scores in the
+    calling thread, so the TextBlob fallback never queues behind slow
+    Gemini calls. `source` records which path produced the rating:
+    "gemini+textblob", "gemini", "textblob", "textblob (gemini timeout)"
+    or "default".
+    """
+    start = time.monotonic()
+    gemini_future = get_rating_pool().submit(rate_with_gemini, content)
+    try:
+        blob_rating = rate_with_textblob(content)
+    except Exception:
+        blob_rating = None
+    
+    gemini_timed_out = False
+    try:
+        remaining = GEMINI_RATING_TIMEOUT - (time.monotonic() - start)
+        gemini_rating = gemini_future.result(timeout=max(0, remaining))
+    except FutureTimeout:
+        gemini_rating = None
+        gemini_timed_out = True
+    
+    return combine_ratings(gemini_rating, blob_rating, gemini_timed_out)
+
+def combine_ratings(gemini_rating, blob_rating, gemini_timed_out=False):
+    """Blend the two scores (Gemini weighted 4:1) into (rating, source)"""
+    if gemini_rating and blob_rating:
         final = round((gemini_rating * 4 + blob_rating) / 5)
-        return max(1, min(5, final))
-    return blob_rating
+        return max(1, min(5, final)), "gemini+textblob"
+    if gemini_rating:
+        return max(1, min(5, gemini_rating)), "gemini"
+    if blob_rating:
+        return blob_rating, "textblob (gemini timeout)" if gemini_timed_out else "textblob"
+    return 3, "default"
+
+RATING_BATCH_TOKENS = int(os.getenv("RATING_BATCH_TOKENS", "24000"))  # blog content per batch request
+RATING_BATCH_MAX = 40  # blogs per batch request
+RATING_BATCH_TIMEOUT = float(os.getenv("RATING_BATCH_TIMEOUT", "120"))  # seconds per batch request
+RATING_BULK_CONCURRENCY = int(os.getenv("RATING_BULK_CONCURRENCY", "2"))  # batch requests in flight
+RATING_BATCH_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "ARRAY",
+        "items": {
+            "type": "OBJECT",
+            "properties": {
+                "id": {"type": "INTEGER"},
+                "rating": {"type": "INTEGER"}
+            },
+            "required": ["id", "rating"]
+        }
+    }
+}
+
+def iter_rating_batches(contents):
+    """Group positions of `contents` into batches that fit the token budget.
+    A blog larger than the budget on its own gets a batch to itself."""
+    max_chars = RATING_BATCH_TOKENS * CHARS_PER_TOKEN
+    batch, size = [], 0
+    for i, content in enumerate(contents):
+        if batch and (size + len(content) > max_chars or len(batch) >= RATING_BATCH_MAX):
+            yield batch
+            batch, size = [], 0
+        batch.append(i)
+        size += len(content)
+    if batch:
+        yield batch
+
+def rate_with_gemini_batch(contents):
+    """Gemini ratings for several blogs in one request, as a list aligned
+    with `contents` (None where no valid rating came back)"""
+    blogs = "\n\n".join(f"Blog ID {i}:\n{content}\n---" for i, content in enumerate(contents, 1))
+    prompt = (
+        "You are an expert finance content reviewer.\n"
+        "Rate each of the following blogs on a scale of 1 to 5 based on:\n"
+        "- Relevance to finance topics\n"
+        "- Depth, clarity, grammar, coherence\n\n"
+        "Return one record per blog with its ID and an integer rating (1 to 5).\n\n"
+        f"{blogs}"
+    )
+    ratings = [None] * len(contents)
+    try:
+        records = json.loads(generate_text(prompt, generation_config=RATING_BATCH_CONFIG, timeout=RATING_BATCH_TIMEOUT))
+    except Exception:
+        return ratings
+    for record in records if isinstance(records, list) else []:
+        if not isinstance(record, dict):
+            continue
+        blog_id, rating = record.get("id"), record.get("rating")
+        if isinstance(blog_id, int) and isinstance(rating, int) and 1 <= blog_id <= len(contents) and 1 <= rating <= 5:
+            ratings[blog_id - 1] = rating
+    return ratings
+
+def rate_blogs(contents, on_progress=None, require_gemini=False):
+    """(rating, source) for each blog content, rating many blogs per Gemini
+    request; batches run on the bulk rating pool, apart from the pool that
+    rates single posts, so a bulk run never delays a publish.
+
+    With `require_gemini`, blogs Gemini returned no rating for (failed
+    request, bad JSON, missing record) come back as None rather than as a
+    TextBlob-only fallback.
+    """
+    def rate_batch(batch):
+        batch_contents = [contents[i] for i in batch]
+        gemini_ratings = rate_with_gemini_batch(batch_contents)
+        blob_ratings = rate_with_textblob_batch(batch_contents)
+        return batch, [
+            None if require_gemini and gemini_rating is None else combine_ratings(gemini_rating, blob_rating)
+            for gemini_rating, blob_rating in zip(gemini_ratings, blob_ratings)
+        ]
+    
+    results = [None] * len(contents)
+    futures = [get_bulk_rating_pool().submit(rate_batch, batch) for batch in iter_rating_batches(contents)]
+    done = 0
+    for future in as_completed(futures):
+        batch, ratings = future.result()
+        for i, rating in zip(batch, ratings):
+            results[i] = rating
+        done += len(batch)
+        if on_progress:
+            on_progress(done, len(contents))
+    return results
+
+# ============================================
+# BULK BLOG IMPORT
+# ============================================
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "200"))  # records rated and committed together
+IMPORT_DIR = STORAGE_DIR / "imports"
+
+def iter_import_records(uploaded_file):
+    """Yield raw records from a CSV or JSONL upload one at a time (None for unparseable lines)"""
+    lines = codecs.iterdecode(uploaded_file, "utf-8-sig", errors="replace")
+    if uploaded_file.name.lower().endswith(".csv"):
+        yield from csv.DictReader(lines)
+        return
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+def to_blog(record):
+    """Blog dict from an imported record, or None if required fields are missing"""
+    if not isinstance(record, dict):
+        return None
+    user_name = str(record.get('user_name') or record.get('author') or "").strip()
+    title = str(record.get('title') or "").strip()
+    content = str(record.get('content') or "").strip()
+    if not user_name or not title or not content:
+        return None
+    try:
+        posted = datetime.fromisoformat(str(record['time'])) if record.get('time') else datetime.now()
+    except ValueError:
+        posted = datetime.now()
+    def count(value):
+        try:
+            return int(value or 0)
+        except (TypeError, ValueError):
+            return 0
+    return {
+        'user_name': user_name,
+        'title': title,
+        'content': content,
+        'tag': str(record.get('tag') or "").strip() or "General Finance",
+        'time': posted,
+        'likes': count(record.get('likes')),
+        'comments': count(record.get('comments'))
+    }
+
+def load_import_checkpoint(file_hash):
+    path = IMPORT_DIR / f"{file_hash}.json"
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    return {'offset': 0, 'imported': 0, 'skipped': 0, 'done': False}
+
+def save_import_checkpoint(file_hash, checkpoint):
+    IMPORT_DIR.mkdir(exist_ok=True)
+    tmp = IMPORT_DIR / f"{file_hash}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, IMPORT_DIR / f"{file_hash}.json")
+
+def import_blogs(uploaded_file, on_progress=None):
+    """Stream blogs from a CSV/JSONL upload into storage in rated batches.
+
+    Progress is checkpointed after every committed batch, keyed by a hash of
+    the file, so importing the same file again resumes where it stopped.
+    Each blog carries an 'import_ref' so a batch committed just before an
+    interruption isn't imported twice. `on_progress(checkpoint, per_second)`
+    is called after each batch. Returns the final checkpoint.
+    """
+    file_hash = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    checkpoint = load_import_checkpoint(file_hash)
+    if checkpoint['done']:
+        return checkpoint
+    
+    ref_prefix = f"{file_hash[:16]}:"
+    committed = {b['import_ref'] for b in corpus.blogs if b.get('import_ref', "").startswith(ref_prefix)}
+    records = islice(iter_import_records(uploaded_file), checkpoint['offset'], None)
+    start, imported = time.monotonic(), 0
+    while True:
+        chunk = list(islice(records, IMPORT_BATCH_SIZE))
+        if not chunk:
+            break
+        blogs = []
+        for position, record in enumerate(chunk, checkpoint['offset']):
+            blog = to_blog(record)
+            if blog is None:
+                checkpoint['skipped'] += 1
+            elif f"{ref_prefix}{position}" not in committed:
+                blogs.append(dict(blog, import_ref=f"{ref_prefix}{position}"))
+        
+        ratings = rate_blogs([blog['content'] for blog in blogs])
+        for blog, (rating, source) in zip(blogs, ratings):
+            blog.update(rating=rating, rating_source=source)
+        corpus.add_blogs(blogs)
+        
+        checkpoint['offset'] += len(chunk)
+        checkpoint['imported'] += len(blogs)
+        imported += len(blogs)
+        save_import_checkpoint(file_hash, checkpoint)
+        if on_progress:
+            on_progress(checkpoint, imported / max(time.monotonic() - start, 1e-9))
+    
+    checkpoint['done'] = True
+    save_import_checkpoint(file_hash, checkpoint)
+    return checkpoint
 
 # ============================================
 # MARKET ALERTS FUNCTIONS
 # ============================================
+NEWS_CONNECT_TIMEOUT = 3.05  # seconds to establish the TCP/TLS connection
+NEWS_READ_TIMEOUT = 10  # seconds to wait for the response
+HTTP_POOL_SIZE = 10  # kept-alive connections per host
+
+class JitteredRetry(Retry):
+    """Exponential backoff with random jitter so retries from many sessions don't align"""
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, backoff) if backoff else 0
+
+@st.cache_resource
+def get_http_session():
+    """requests.Session shared by all sessions: pooled keep-alive connections
+    and retries with backoff on 429/5xx"""
+    retry = JitteredRetry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+class NewsError(Exception):
+    """NewsAPI could not be reached or returned an error"""
+
 @st.cache_data(ttl=600)
 def fetch_news():
     url = f"https://newsapi.org/v2/top-headlines?category=business&language=en&pageSize=10&apiKey={NEWS_API_KEY}"
     try:
-        response = requests.get(url, timeout=10)
+        response = get_http_session().get(url, timeout=(NEWS_CONNECT_TIMEOUT, NEWS_READ_TIMEOUT))
         response.raise_for_status()  # Raise error for bad status codes
         data = response.json()
-        
-        # Check if API returned an error
-        if data.get('status') == 'error':
-            st.error(f"News API Error: {data.get('message', 'Unknown error')}")
-            return []
-        
-        articles = data.get('articles', [])
-        if not articles:
-            return []
-            
-        return [
-            f"{article['title']}. {article['description']}"
-            for article in articles
-            if article.get('title') and article.get('description')
-        ]
     except requests.exceptions.Timeout:
-        st.error("⏱️ News API request timed out. Please try again.")
-        return []
+        raise NewsError("⏱️ News API request timed out. Please try again.")
     except requests.exceptions.RequestException as e:
-        st.error(f"🌐 Network error: {str(e)}")
-        return []
+        raise NewsError(f"🌐 Network error: {str(e)}")
     except Exception as e:
-        st.error(f"❌ Error fetching news: {str(e)}")
-        return []
+        raise NewsError(f"❌ Error fetching news: {str(e)}")
+    
+    # Check if API returned an error
+    if data.get('status') == 'error':
+        raise NewsError(f"News API Error: {data.get('message', 'Unknown error')}")
+    
+    articles = data.get('articles', [])
+    return [
+        f"{article['title']}. {article['description']}"
+        for article in articles
+        if article.get('title') and article.get('description')
+    ]
 
-@st.cache_data(ttl=600)
 def get_stock_alerts(news_list):
     if not news_list:
         return []
-    prompt = "\n".join(f"- {headline}" for headline in news_list)
+    prompt = "\n".join(f"[{i}] {headline}" for i, headline in enumerate(news_list, 1))
     full_prompt = f"""
 You are an expert stock market analyst and financial writer.
 Below are recent business news headlines.
@@ -164,16 +816,18 @@ Your task:
    - Whether the effect is *Positive, **Negative, or **Neutral*
    - A detailed, beginner-friendly explanation of why this matters for investors and how it will impact the stocks. Use emojis where appropriate.
 Format each item like this:
-- [Headline] — [Company/Sector] — [Impact Direction] — [Detailed Explanation]
+- [Headline number] [Headline] — [Company/Sector] — [Impact Direction] — [Detailed Explanation]
 
 Headlines:
 {prompt}
 """
     try:
-        response = model.generate_content(full_prompt)
-        return response.text.strip().split("\n")
+        lines = generate_text(full_prompt).strip().split("\n")
     except:
         return []
+    if not parse_alerts(lines):
+        forget_text(full_prompt)
+    return lines
 
 def parse_alerts(lines):
     alerts = []
@@ -183,22 +837,371 @@ def parse_alerts(lines):
                 continue
             parts = [p.strip(" -*—") for p in line.split("—")]
             if len(parts) >= 4:
+                # "[3] Headline" -> headline number 3 of the prompt
+                number = re.match(r"\[(\d+)\]\s*", parts[0])
                 alerts.append({
-                    "headline": parts[0],
+                    "headline": parts[0][number.end():] if number else parts[0],
                     "stock": parts[1],
                     "impact": parts[2],
-                    "summary": parts[3]
+                    "summary": parts[3],
+                    "index": int(number.group(1)) if number else None
                 })
         except:
             continue
     return alerts
 
+ALERTS_JSON_MODE = os.getenv("ALERTS_JSON_MODE", "true").lower() in ("1", "true", "yes")
+ALERT_IMPACTS = ("Positive", "Negative", "Neutral")
+ALERTS_JSON_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "ARRAY",
+        "items": {
+            "type": "OBJECT",
+            "properties": {
+                "index": {"type": "INTEGER"},
+                "headline": {"type": "STRING"},
+                "company": {"type": "STRING"},
+                "impact": {"type": "STRING", "enum": list(ALERT_IMPACTS)},
+                "explanation": {"type": "STRING"}
+            },
+            "required": ["index", "headline", "company", "impact", "explanation"]
+        }
+    }
+}
+
+def get_stock_alerts_json(news_list):
+    """Structured variant of get_stock_alerts: a JSON array with one record
+    per market-moving headline, or None if the request failed"""
+    if not news_list:
+        return None
+    prompt = "\n".join(f"[{i}] {headline}" for i, headline in enumerate(news_list, 1))
+    full_prompt = f"""
+You are an expert stock market analyst and financial writer.
+Below are recent business news headlines, each with its number in brackets.
+Select only the headlines that are likely to move stock prices — up or down — and for each one return:
+- index: the headline number
+- headline: the headline
+- company: the affected company or sector
+- impact: Positive, Negative or Neutral
+- explanation: a detailed, beginner-friendly explanation of why this matters for investors and how it will impact the stocks. Use emojis where appropriate.
+
+Headlines:
+{prompt}
+"""
+    try:
+        text = generate_text(full_prompt, generation_config=ALERTS_JSON_CONFIG)
+    except:
+        return None
+    if parse_alerts_json(text) is None:
+        forget_text(full_prompt, ALERTS_JSON_CONFIG)
+    return text
+
+def parse_alerts_json(text):
+    """Alerts from a structured response, or None if it doesn't match the schema.
+
+    Individual malformed records (including an impact other than Positive,
+    Negative or Neutral) are skipped; a response that isn't a list
+    of records at all is rejected so the caller can fall back.
+    """
+    try:
+        records = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(records, list):
+        return None
+    alerts = []
+    for record in records:
+        if not isinstance(record, dict):
+            return None
+        fields = [record.get(k) for k in ("headline", "company", "impact", "explanation")]
+        if not all(isinstance(f, str) and f.strip() for f in fields):
+            continue
+        headline, company, impact, explanation = (f.strip() for f in fields)
+        impact = next((i for i in ALERT_IMPACTS if i.lower() == impact.lower()), None)
+        if impact is None:
+            continue
+        index = record.get("index")
+        alerts.append({
+            "headline": headline,
+            "stock": company,
+            "impact": impact,
+            "summary": explanation,
+            "index": index if isinstance(index, int) else None
+        })
+    if records and not alerts:
+        return None
+    return alerts
+
+class HeadlineAnalysisStore:
+    """Alerts already produced for each headline, keyed by a hash of the
+    headline, so each poll only sends unseen headlines to Gemini"""
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self._entries = OrderedDict()  # hash -> list of alerts (empty: not market-moving)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(headline):
+        return hashlib.sha256(headline.encode("utf-8")).hexdigest()
+
+    def missing(self, headlines):
+        with self._lock:
+            return [h for h in headlines if self.key(h) not in self._entries]
+
+    def put(self, headline, alerts):
+        with self._lock:
+            self._entries[self.key(headline)] = alerts
+            self._entries.move_to_end(self.key(headline))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def alerts_for(self, headlines):
+        with self._lock:
+            return [alert for h in headlines for alert in self._entries.get(self.key(h), [])]
+
+@st.cache_resource
+def get_headline_store():
+    return HeadlineAnalysisStore()
+
+def match_headline(alert, headlines):
+    """Position in `headlines` that a parsed alert refers to"""
+    if alert['index'] is not None and 1 <= alert['index'] <= len(headlines):
+        return alert['index'] - 1
+    # No usable headline number: fall back to the closest headline text
+    ratios = [SequenceMatcher(None, alert['headline'].lower(), h.lower()).ratio() for h in headlines]
+    return ratios.index(max(ratios))
+
+def analyze_headlines(news_list):
+    """Alerts for `news_list`, sending only headlines not analyzed before to Gemini"""
+    store = get_headline_store()
+    new = store.missing(news_list)
+    if new:
+        alerts = None
+        if ALERTS_JSON_MODE:
+            text = get_stock_alerts_json(new)
+            alerts = parse_alerts_json(text) if text else None
+        if alerts is None:
+            # Legacy free-text format. A failed request or a reply with no
+            # parseable alert lines is retried next poll rather than
+            # recording every headline as not market-moving.
+            lines = get_stock_alerts(new)
+            alerts = parse_alerts(lines) or None
+        if alerts is not None:  # otherwise retry these headlines next poll
+            by_headline = [[] for _ in new]
+            for alert in alerts:
+                by_headline[match_headline(alert, new)].append(
+                    {k: v for k, v in alert.items() if k != 'index'}
+                )
+            for headline, headline_alerts in zip(new, by_headline):
+                store.put(headline, headline_alerts)
+    return store.alerts_for(news_list)
+
+NEWS_POLL_INTERVAL = int(os.getenv("NEWS_POLL_INTERVAL", "600"))  # seconds, matches fetch_news TTL
+NEWS_POLL_START_DELAY = float(os.getenv("NEWS_POLL_START_DELAY", "15"))  # seconds after process start
+NEWS_REFRESH_MIN_INTERVAL = 30  # seconds between manual refreshes that bypass the news cache
+
+class NewsPoller:
+    """Background thread that polls NewsAPI, analyzes the headlines and
+    publishes a ready snapshot, so page renders never wait on NewsAPI or
+    Gemini (except before the first poll completes).
+
+    A snapshot is a dict with 'alerts', 'headlines' (count), 'error' and
+    'updated_at'. A failed poll keeps the last good alerts and sets 'error'.
+    The first poll runs `start_delay` seconds after creation, or as soon as
+    a page waits for a snapshot.
+    """
+
+    def __init__(self, interval, start_delay=0):
+        self.interval = interval
+        self.start_delay = start_delay
+        self.snapshot = None
+        self._polls = 0
+        self._polling = None  # None, "scheduled" or "forced"
+        self._force = False
+        self._last_forced = float("-inf")
+        self._wake = threading.Event()
+        self._ready = threading.Condition()
+        threading.Thread(target=self._run, name="news-poller", daemon=True).start()
+
+    def _run(self):
+        # Leave the process's first page renders alone; wait()/refresh() cut this short
+        self._wake.wait(self.start_delay)
+        while True:
+            self._wake.clear()
+            self._poll()
+            self._wake.wait(self.interval)
+
+    def _poll(self):
+        with self._ready:
+            forced, self._force = self._force, False
+            self._polling = "forced" if forced else "scheduled"
+        if forced and time.monotonic() - self._last_forced >= NEWS_REFRESH_MIN_INTERVAL:
+            # Only the headline fetch is invalidated: per-headline analyses
+            # and every other cached function stay warm
+            fetch_news.clear()
+            self._last_forced = time.monotonic()
+        try:
+            news = fetch_news()
+            snapshot = {
+                'alerts': analyze_headlines(news),
+                'headlines': len(news),
+                'error': None,
+                'updated_at': datetime.now()
+            }
+        except NewsError as e:
+            snapshot = dict(self.snapshot or {'alerts': [], 'headlines': 0, 'updated_at': None}, error=str(e))
+        except Exception as e:
+            snapshot = dict(self.snapshot or {'alerts': [], 'headlines': 0, 'updated_at': None},
+                            error=f"❌ Error analyzing news: {str(e)}")
+        with self._ready:
+            self.snapshot = snapshot
+            self._polls += 1
+            self._polling = None
+            self._ready.notify_all()
+
+    def wait(self, timeout=None):
+        """Latest snapshot, waiting up to `timeout` for the first poll if needed"""
+        with self._ready:
+            if self.snapshot is None:
+                self._wake.set()  # still in the start delay: poll now
+            self._ready.wait_for(lambda: self.snapshot is not None, timeout)
+            return self.snapshot
+
+    def refresh(self, timeout=None):
+        """Poll now instead of at the next interval and wait for the result.
+
+        Concurrent refreshes coalesce: they all wait on the same forced poll.
+        """
+        with self._ready:
+            if self._polling == "forced":
+                target = self._polls + 1
+            else:
+                # A scheduled poll in flight may be serving cached headlines
+                target = self._polls + (2 if self._polling else 1)
+                self._force = True
+                self._wake.set()
+            self._ready.wait_for(lambda: self._polls >= target, timeout)
+            return self.snapshot
+
+@st.cache_resource
+def get_news_poller():
+    return NewsPoller(NEWS_POLL_INTERVAL, NEWS_POLL_START_DELAY)
+
+# Started with the process so the first poll is usually done before anyone
+# opens Market Alerts. The first poll is delayed so that its Gemini SDK import
+# and requests don't compete with the cold-start render of whatever page
+# was opened.
+news_poller = get_news_poller()
+
 # ============================================
 # DOCUMENT SUMMARIZER FUNCTIONS
 # ============================================
-def summarize_document(content, doc_type="general"):
-    """Summarize financial document using Gemini"""
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "8000"))  # per-prompt content budget
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))  # parallel chunk requests
+
+def split_paragraphs(text, max_chars):
+    """Yield paragraphs of `text`, cutting any longer than `max_chars` on sentence boundaries"""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= max_chars:
+            if paragraph:
+                yield paragraph
+            continue
+        # Oversized paragraph: fall back to sentence boundaries, then hard cuts
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            for i in range(0, len(sentence), max_chars):
+                yield sentence[i:i + max_chars]
+
+def iter_chunks(segments, max_tokens):
+    """Lazily pack text segments (e.g. pages) into chunks under a token budget"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    current, size = [], 0
+    for segment in segments:
+        for piece in split_paragraphs(segment, max_chars):
+            if current and size + len(piece) + 2 > max_chars:
+                yield "\n\n".join(current)
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 2
+    if current:
+        yield "\n\n".join(current)
+
+def summarize_chunk(chunk, doc_type, index):
+    """Map step: condensed notes for one part of a long document"""
     prompt = f"""
+You are an expert financial analyst. This is part {index} of a longer {doc_type} document.
+
+Write concise notes on this part only, covering:
+- Key financial metrics (keep exact numbers, ratios, periods)
+- Main findings and observations
+- Risk factors mentioned
+- Any recommendations or guidance stated
+
+Document Part:
+{chunk}
+"""
+    return generate_text(prompt).strip()
+
+def summarize_chunks(chunks, doc_type, on_progress=None):
+    """Notes for each chunk, in order, with at most SUMMARY_CONCURRENCY requests in flight.
+
+    Chunks are pulled from the iterable only as workers free up, so a
+    streamed document is never read far ahead of the model. The total
+    passed to `on_progress(done, total)` is None until the last chunk has
+    been read.
+    """
+    notes = []
+    pending = {}
+    done = 0
+    with ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY) as pool:
+        for i, chunk in enumerate(chunks):
+            while len(pending) >= SUMMARY_CONCURRENCY:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    notes[pending.pop(future)] = future.result()
+                    done += 1
+                    if on_progress:
+                        on_progress(done, None)
+            notes.append(None)
+            pending[pool.submit(summarize_chunk, chunk, doc_type, i + 1)] = i
+        if on_progress:
+            on_progress(done, len(notes))
+        for future in as_completed(pending):
+            notes[pending[future]] = future.result()
+            done += 1
+            if on_progress:
+                on_progress(done, len(notes))
+    return notes
+
+def build_summary_prompt(content, doc_type="general", on_progress=None):
+    """Prompt for the five-section summary of a document.
+
+    `content` is a string or an iterable of text segments (e.g. pages),
+    which is consumed lazily. Documents over the chunk budget are first
+    condensed part by part in parallel (the map step), and the prompt is
+    built over those notes. `on_progress(done, total)` is called as parts
+    complete (`total` is None while the document is still being read). Raises ValueError if the document has no text at all (e.g. a
+    scanned, image-only PDF), before anything is sent to Gemini.
+    """
+    label = "Document Content"
+    segments = [content] if isinstance(content, str) else content
+    while True:
+        chunks = iter_chunks(segments, SUMMARY_CHUNK_TOKENS)
+        first = next(chunks, "")
+        second = next(chunks, None)
+        if second is None:
+            if not first.strip():
+                raise ValueError("No text could be extracted from this document. "
+                                 "Scanned or image-only PDFs need to be OCR'd first.")
+            content = first
+            break
+        notes = summarize_chunks(chain([first, second], chunks), doc_type, on_progress)
+        label = "Notes on Each Part of the Document (in order)"
+        segments = [f"Part {i + 1}:\n{note}" for i, note in enumerate(notes)]
+    
+    return f"""
 You are an expert financial analyst specializing in document analysis.
 
 Document Type: {doc_type}
@@ -211,47 +1214,325 @@ Please provide a comprehensive summary of this financial document with the follo
 4. **Risk Factors** (if any are mentioned)
 5. **Recommendations** (actionable insights for stakeholders)
 
-Document Content:
+{label}:
 {content}
 
 Provide a clear, professional summary suitable for executives and investors.
 """
-    try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        return f"Error generating summary: {str(e)}"
+
+def summarize_document(content, doc_type="general", on_progress=None):
+    """Summarize financial document using Gemini (errors propagate, so a failed
+    run is never mistaken for a summary)"""
+    return generate_text(build_summary_prompt(content, doc_type, on_progress)).strip()
+
+def stream_summary(content, doc_type="general", on_progress=None):
+    """Like summarize_document, but yields the summary text as Gemini writes it"""
+    yield from stream_text(build_summary_prompt(content, doc_type, on_progress))
+
+# ============================================
+# DOCUMENT INGESTION
+# ============================================
+PDF_PAGES_PER_TASK = 16  # pages extracted per worker task
+PDF_PARALLEL_MIN_PAGES = 32  # smaller PDFs are extracted in-process
+
+@st.cache_resource
+def get_extraction_pool():
+    # Workers must be forked: under spawn/forkserver they would re-import the
+    # running Streamlit script as their __main__. Without fork, extract inline.
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    return ProcessPoolExecutor(mp_context=multiprocessing.get_context("fork"))
+
+def iter_pdf_pages(uploaded_file, on_progress=None, parallel=True):
+    """Yield PDF page text in page order, fanning page ranges out to worker processes"""
+    from PyPDF2 import PdfReader
+    from pdf_extract import extract_page_range
+    
+    reader = PdfReader(uploaded_file)
+    total = len(reader.pages)
+    
+    def extract_inline(start):
+        for done, page in enumerate(reader.pages[start:], start + 1):
+            yield page.extract_text() or ""
+            if on_progress:
+                on_progress(done, total)
+    
+    pool = get_extraction_pool() if parallel else None
+    if pool is None or total < PDF_PARALLEL_MIN_PAGES:
+        yield from extract_inline(0)
+        return
+    
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        uploaded_file.seek(0)
+        shutil.copyfileobj(uploaded_file, tmp)
+        tmp.flush()
+        done = 0
+        try:
+            futures = [
+                pool.submit(extract_page_range, tmp.name, start, min(start + PDF_PAGES_PER_TASK, total))
+                for start in range(0, total, PDF_PAGES_PER_TASK)
+            ]
+            try:
+                for future in futures:
+                    pages = future.result()
+                    done += len(pages)
+                    if on_progress:
+                        on_progress(done, total)
+                    yield from pages
+            finally:
+                for future in futures:
+                    future.cancel()
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory on a huge PDF) and the pool is
+            # unusable: replace it for later uploads and finish this one inline
+            get_extraction_pool.clear()
+            pool.shutdown(wait=False, cancel_futures=True)
+            yield from extract_inline(done)
+
+def iter_document_text(uploaded_file, on_progress=None, parallel=True):
+    """Yield the text of an uploaded PDF, DOCX or TXT file page by page
+    (paragraph/row for DOCX, line for TXT) without building the whole text"""
+    name = uploaded_file.name.lower()
+    if name.endswith(".pdf"):
+        yield from iter_pdf_pages(uploaded_file, on_progress, parallel)
+    elif name.endswith(".docx"):
+        import docx
+        
+        document = docx.Document(uploaded_file)
+        for paragraph in document.paragraphs:
+            yield paragraph.text
+        for table in document.tables:
+            for row in table.rows:
+                yield " | ".join(cell.text for cell in row.cells)
+    else:
+        yield from codecs.iterdecode(uploaded_file, "utf-8", errors="replace")
+
+def document_preview(uploaded_file, limit=500):
+    """Text from the start of an uploaded document, for the summary history"""
+    parts, size = [], 0
+    for segment in iter_document_text(uploaded_file, parallel=False):
+        parts.append(segment.rstrip("\n"))
+        size += len(segment)
+        if size >= limit:
+            break
+    uploaded_file.seek(0)
+    return "\n".join(parts)
+
+# ============================================
+# SUMMARY SEARCH
+# ============================================
+SUMMARY_SEARCH_RESULTS = 5
+SUMMARY_SEARCH_MIN_SCORE = float(os.getenv("SUMMARY_SEARCH_MIN_SCORE", "0.5"))  # cosine similarity below which a summary isn't a match
+SUMMARY_EMBEDDING_MODEL = os.getenv("SUMMARY_EMBEDDING_MODEL", "models/gemini-embedding-001")
+SUMMARY_EMBEDDING_DIM = 768
+SUMMARY_EMBEDDING_BATCH = 100  # texts per embedding request
+SUMMARY_IVF_MIN = int(os.getenv("SUMMARY_IVF_MIN", "20000"))  # summaries before IVF partitioning
+
+def embed_texts(texts, task_type):
+    """Unit-length Gemini embeddings of `texts`, one row per text"""
+    import google.generativeai as genai
+    import numpy as np
+    get_model()  # configures the SDK with the API key
+    result = genai.embed_content(
+        model=SUMMARY_EMBEDDING_MODEL,
+        content=list(texts),
+        task_type=task_type,
+        output_dimensionality=SUMMARY_EMBEDDING_DIM
+    )
+    vectors = np.asarray(result['embedding'], dtype=np.float32).reshape(-1, SUMMARY_EMBEDDING_DIM)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def embed_query(query):
+    """Embedding of a search query, cached so reruns don't request it again"""
+    return embed_texts([query], "retrieval_query")[0]
+
+def source_fingerprint(uploaded_file=None, text=""):
+    """SHA-256 of the full document: the uploaded file's bytes, or the pasted
+    text with whitespace collapsed"""
+    if uploaded_file is not None:
+        data = uploaded_file.getvalue()
+    else:
+        data = " ".join(text.split()).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+class SummaryIndex:
+    """Gemini embeddings of the corpus summaries in a local vector index,
+    plus a fingerprint lookup for documents that were already summarized.
+
+    The corpus only ever appends summaries, so each sync indexes just the
+    ones added since the last. Their vectors are appended to `vectors_path`
+    keyed by summary id, so after a restart only summaries that were never
+    embedded go to Gemini (in batches). Summaries recorded from failed runs
+    are never indexed or offered as matches.
+    """
+
+    def __init__(self, vectors_path):
+        import numpy as np
+        from vector_index import VectorIndex  # numpy is loaded on first use only
+        self.topics = VectorIndex(SUMMARY_EMBEDDING_DIM, ivf_min=SUMMARY_IVF_MIN)
+        self.records = []  # summary behind each row of `topics`
+        self.by_source = {}  # source fingerprint -> latest summary of that document
+        self.vectors_path = vectors_path
+        self._row = np.dtype([('id', '<i8'), ('vector', '<f4', (SUMMARY_EMBEDDING_DIM,))])
+        self._stored = None  # summary id -> saved vector, read on the first sync
+        self._embedded = 0  # corpus summaries indexed so far
+        self._fingerprinted = 0  # corpus summaries added to `by_source` so far
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    @staticmethod
+    def usable(summary):
+        return not summary['summary'].startswith("Error generating summary")
+
+    def _load_vectors(self):
+        import numpy as np
+        if not self.vectors_path.exists():
+            return {}
+        with open(self.vectors_path, "r+b") as f:
+            data = f.read()
+            whole = len(data) - len(data) % self._row.itemsize
+            if whole < len(data):  # torn tail from a crash mid-append
+                f.truncate(whole)
+        rows = np.frombuffer(data[:whole], dtype=self._row)
+        return dict(zip(rows['id'].tolist(), rows['vector']))
+
+    def _save_vectors(self, ids, vectors):
+        import numpy as np
+        rows = np.empty(len(ids), dtype=self._row)
+        rows['id'] = ids
+        rows['vector'] = vectors
+        with open(self.vectors_path, "ab") as f:
+            f.write(rows.tobytes())
+
+    def sync(self, summaries):
+        """Index summaries added since the last sync. If another session is
+        already syncing, return at once and search what is indexed so far."""
+        import numpy as np
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            if self._stored is None:
+                self._stored = self._load_vectors()
+            while self._embedded < len(summaries):
+                batch = summaries[self._embedded:self._embedded + SUMMARY_EMBEDDING_BATCH]
+                new = [s for s in batch if self.usable(s)]
+                missing = [s for s in new if s['id'] not in self._stored]
+                if missing:
+                    vectors = embed_texts([f"{s['title']}\n{s['summary']}" for s in missing], "retrieval_document")
+                    ids = [s['id'] for s in missing]
+                    self._save_vectors(ids, vectors)
+                    self._stored.update(zip(ids, vectors))
+                if new:
+                    # Records first: a concurrent search never sees a row without one
+                    self.records.extend(new)
+                    self.topics.add(np.stack([self._stored[s['id']] for s in new]))
+                self._embedded += len(batch)
+        finally:
+            self._sync_lock.release()
+
+    def search(self, query, k=SUMMARY_SEARCH_RESULTS):
+        """[(summary, similarity)] nearest to a free-text query, best first"""
+        rows, scores = self.topics.search(embed_query(query), k)
+        return [(self.records[row], float(score)) for row, score in zip(rows, scores)
+                if score >= SUMMARY_SEARCH_MIN_SCORE]
+
+    def find_duplicate(self, summaries, fingerprint):
+        """Latest earlier summary of the document with this fingerprint, or None"""
+        with self._lock:
+            for summary in summaries[self._fingerprinted:]:
+                if summary.get('source_hash') and self.usable(summary):
+                    self.by_source[summary['source_hash']] = summary
+            self._fingerprinted = len(summaries)
+        return self.by_source.get(fingerprint)
+
+@st.cache_resource
+def get_summary_index():
+    model = SUMMARY_EMBEDDING_MODEL.rsplit("/", 1)[-1]
+    return SummaryIndex(STORAGE_DIR / f"summary_vectors-{model}-{SUMMARY_EMBEDDING_DIM}.bin")
+
+def synced_summary_index():
+    summary_index = get_summary_index()
+    summary_index.sync(corpus.summaries)
+    return summary_index
 
 # ============================================
 # FINANCE TERMS DICTIONARY
 # ============================================
-FINANCE_TERMS = {
-    "Balance Sheet": "बैलेंस शीट / Bilan / Balance general - A financial statement showing assets, liabilities, and equity",
-    "Net Profit": "शुद्ध लाभ / Bénéfice net / Utilidad neta - Revenue minus all expenses and taxes",
-    "Assets": "परिसंपत्तियाँ / Actifs / Activos - Resources owned by a business with economic value",
-    "Liabilities": "देनदारियाँ / Passifs / Pasivos - Financial obligations or debts owed",
-    "Revenue": "राजस्व / Chiffre d'affaires / Ingresos - Total income generated from business operations",
-    "Depreciation": "मूल्यह्रास / Amortissement / Depreciación - Decrease in asset value over time",
-    "Dividend": "लाभांश / Dividende / Dividendo - Payment made to shareholders from profits",
-    "Cash Flow": "नकदी प्रवाह / Flux de trésorerie / Flujo de efectivo - Movement of money in and out of business",
-    "ROI": "निवेश प्रतिफल / Retour sur investissement / Retorno de inversión - Return on Investment percentage",
-    "IPO": "प्रारंभिक सार्वजनिक निर्गम / Offre publique initiale / Oferta pública inicial - Initial Public Offering",
-    "Capital Gains": "पूंजी लाभ / Gains en capital / Ganancias de capital - Profit from selling an asset",
-    "Equity": "स्वामित्व पूंजी / Capital-actions / Capital accionario - Ownership value in a company",
-    "Debt": "ऋण / Dette / Deuda - Money owed to creditors",
-    "Portfolio": "निवेश पोर्टफोलियो / Portefeuille / Portafolio - Collection of investments",
-    "Mutual Fund": "म्यूचुअल फंड / Fonds commun / Fondo mutuo - Pooled investment vehicle",
-    "Bond": "बांड / Obligation / Bono - Fixed-income debt security",
-    "Stock": "शेयर / Action / Acción - Share of ownership in a company",
-    "Interest Rate": "ब्याज दर / Taux d'intérêt / Tasa de interés - Cost of borrowing money",
-    "Inflation": "मुद्रास्फीति / Inflation / Inflación - Rate of price increase over time",
-    "GDP": "सकल घरेलू उत्पाद / PIB / PIB - Gross Domestic Product",
-    "Market Cap": "बाजार पूंजीकरण / Capitalisation boursière / Capitalización bursátil - Total market value of shares",
-    "Bull Market": "तेजी बाजार / Marché haussier / Mercado alcista - Rising market trend",
-    "Bear Market": "मंदी बाजार / Marché baissier / Mercado bajista - Falling market trend",
-    "Hedge Fund": "हेज फंड / Fonds spéculatif / Fondo de cobertura - Alternative investment fund",
-    "Credit Rating": "ऋण रेटिंग / Notation de crédit / Calificación crediticia - Assessment of creditworthiness"
-}
+GLOSSARY_SOURCE = Path(os.getenv("GLOSSARY_SOURCE", Path(__file__).with_name("glossary.json")))
+GLOSSARY_DB = STORAGE_DIR / "glossary.db"  # compiled from GLOSSARY_SOURCE, memory-mapped
+
+GLOSSARY_RESULTS = 5  # matches shown per search
+GLOSSARY_SUGGESTIONS = 6  # autocomplete suggestions shown while typing
+GLOSSARY_DEBOUNCE = os.getenv("GLOSSARY_DEBOUNCE", "300ms")  # typing pause before the search reruns
+# Search-as-you-type needs text_input(live=...); older Streamlit searches on Enter
+GLOSSARY_LIVE_SEARCH = "live" in inspect.signature(st.text_input).parameters
+
+@st.cache_resource
+def get_glossary():
+    """Glossary dataset shared by all sessions; its search index is built once per reload"""
+    return GlossaryStore(GLOSSARY_SOURCE, GLOSSARY_DB)
+
+glossary = get_glossary()
+glossary.refresh()  # hot reload: recompiles when the source file has changed
+
+GLOSSARY_POPULAR = 8  # terms shown under "Most Searched"
+# Shown until enough lookups have been recorded
+GLOSSARY_DEFAULT_POPULAR = ["Balance Sheet", "Cash Flow", "ROI", "IPO", "Dividend",
+                            "Capital Gains", "Market Cap", "Interest Rate"]
+
+@st.cache_resource
+def get_popularity_counter():
+    """Glossary lookups from all sessions, flushed to disk every 30s and on exit"""
+    return PopularityCounter(STORAGE_DIR / "glossary_popularity.json")
+
+def most_searched_terms(k=GLOSSARY_POPULAR):
+    """The `k` most looked-up terms still in the glossary, topped up with the defaults"""
+    terms = [term for term, _ in get_popularity_counter().top(k * 2) if glossary.get(term) is not None]
+    for term in GLOSSARY_DEFAULT_POPULAR:
+        if len(terms) >= k:
+            break
+        if term not in terms and glossary.get(term) is not None:
+            terms.append(term)
+    return terms[:k]
+
+# ============================================
+# PAGINATION
+# ============================================
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE", "10"))
+PAGE_SIZES = sorted({5, 10, 25, 50, DEFAULT_PAGE_SIZE})
+
+def paginate(key, records):
+    """Render page controls and return one newest-first page of `records`.
+
+    The cursor is the id of the last record on the previous page, so posts
+    published meanwhile don't shift the page being read.
+    """
+    cursors_key = f"{key}_cursors"
+    if cursors_key not in st.session_state:
+        st.session_state[cursors_key] = [None]
+    cursors = st.session_state[cursors_key]
+    
+    page_size = st.selectbox(
+        "Per page", PAGE_SIZES,
+        index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE),
+        key=f"{key}_page_size",
+        on_change=st.session_state.pop, args=(cursors_key, None)
+    )
+    page = Corpus.page(records, cursors[-1], page_size)
+    has_older = bool(page) and page[-1]['id'] > records[0]['id']
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("⬅️ Newer", key=f"{key}_newer", on_click=cursors.pop,
+                  disabled=len(cursors) == 1, use_container_width=True)
+    with col2:
+        st.caption(f"Page {len(cursors)} of {-(-len(records) // page_size)}")
+    with col3:
+        st.button("Older ➡️", key=f"{key}_older", on_click=cursors.append,
+                  args=(page[-1]['id'] if page else None,),
+                  disabled=not has_older, use_container_width=True)
+    return page
 
 # ============================================
 # CUSTOM CSS
@@ -409,9 +1690,13 @@ with st.sidebar:
     
     st.markdown("---")
     st.markdown("### 📈 Quick Stats")
-    st.metric("Terms Available", len(FINANCE_TERMS))
-    st.metric("Total Blogs", len(st.session_state.blogs))
-    st.metric("Summaries Created", len(st.session_state.summaries))
+    st.metric("Terms Available", len(glossary))
+    st.metric("Total Blogs", len(corpus.blogs))
+    st.metric("Summaries Created", len(corpus.summaries))
+    llm_cache = get_llm_cache()
+    st.metric("Gemini Cache Hits", llm_cache.hits)
+    st.metric("Gemini Cache Misses", llm_cache.misses)
+    st.metric("Gemini Calls Coalesced", get_single_flight().shared)
     
     st.markdown("---")
     st.markdown("""
@@ -453,42 +1738,59 @@ if page == "🏠 Home & Glossary":
         search_term = st.text_input(
             "Search for a financial term...",
             placeholder="e.g., Balance Sheet, ROI, IPO, Cash Flow...",
-            label_visibility="collapsed"
+            label_visibility="collapsed",
+            key="glossary_query",
+            **({"live": GLOSSARY_DEBOUNCE} if GLOSSARY_LIVE_SEARCH else {})
         )
     
     with search_col2:
         search_button = st.button("🔍 Search", use_container_width=True)
     
+    # A lookup counts once per query, not on every rerun that shows it
+    new_query = search_term.strip() != st.session_state.get("glossary_last_query")
+    st.session_state["glossary_last_query"] = search_term.strip()
+    
     # Search Logic
     if search_term or search_button:
         search_term_clean = search_term.strip()
+        glossary_index = glossary.index()
+        exact_term = glossary_index.lookup(search_term_clean)
         
         # Exact match
-        if search_term_clean in FINANCE_TERMS:
+        if exact_term:
+            if new_query:
+                get_popularity_counter().record(exact_term)
             st.markdown(f"""
             <div class="glossary-result">
-                <h4>📖 {search_term_clean}</h4>
-                <p>{FINANCE_TERMS[search_term_clean]}</p>
+                <h4>📖 {exact_term}</h4>
+                <p>{glossary.get(exact_term)}</p>
             </div>
             """, unsafe_allow_html=True)
         
-        # Partial match
+        # Ranked match on names, translations and definitions (typo-tolerant)
         else:
-            matches = [term for term in FINANCE_TERMS.keys() 
-                      if search_term_clean.lower() in term.lower()]
+            suggestions = glossary_index.complete(search_term_clean, GLOSSARY_SUGGESTIONS)
+            if suggestions:
+                st.caption("Suggestions")
+                for col, suggestion in zip(st.columns(len(suggestions)), suggestions):
+                    with col:
+                        st.button(suggestion, key=f"suggest_{suggestion}", use_container_width=True,
+                                  on_click=st.session_state.__setitem__, args=("glossary_query", suggestion))
+            
+            matches, total = glossary_index.search(search_term_clean, limit=GLOSSARY_RESULTS)
             
             if matches:
-                st.markdown(f"### Found {len(matches)} matching term(s):")
-                for match in matches[:5]:
+                st.markdown(f"### Found {total} matching term(s):")
+                for match, _ in matches:
                     st.markdown(f"""
                     <div class="glossary-result">
                         <h4>📖 {match}</h4>
-                        <p>{FINANCE_TERMS[match]}</p>
+                        <p>{glossary.get(match)}</p>
                     </div>
                     """, unsafe_allow_html=True)
                 
-                if len(matches) > 5:
-                    st.info(f"Showing top 5 results. {len(matches) - 5} more terms match your search.")
+                if total > GLOSSARY_RESULTS:
+                    st.info(f"Showing top {GLOSSARY_RESULTS} results. {total - GLOSSARY_RESULTS} more terms match your search.")
             
             else:
                 st.markdown(f"""
@@ -502,17 +1804,17 @@ if page == "🏠 Home & Glossary":
     st.markdown("---")
     st.markdown("### 🌟 Most Searched Finance Terms")
     
-    popular_terms = ["Balance Sheet", "Cash Flow", "ROI", "IPO", "Dividend", 
-                     "Capital Gains", "Market Cap", "Interest Rate"]
+    popular_terms = most_searched_terms()
     
     cols = st.columns(4)
     for idx, term in enumerate(popular_terms):
         with cols[idx % 4]:
             if st.button(f"📌 {term}", key=f"pop_{term}", use_container_width=True):
+                get_popularity_counter().record(term)
                 st.markdown(f"""
                 <div class="glossary-result">
                     <h4>📖 {term}</h4>
-                    <p>{FINANCE_TERMS[term]}</p>
+                    <p>{glossary.get(term)}</p>
                 </div>
                 """, unsafe_allow_html=True)
 
@@ -544,46 +1846,117 @@ elif page == "📄 Document Summarizer":
             height=300,
             placeholder="Paste the financial document text you want to summarize..."
         )
+        uploaded_file = st.file_uploader(
+            "Or upload a PDF, DOCX or TXT file",
+            type=["pdf", "docx", "txt"]
+        )
+        stream_output = st.toggle("⚡ Stream the summary as it's written", value=True)
         
         col1, col2, col3 = st.columns([1, 1, 1])
         
         with col2:
-            if st.button("🤖 Generate Summary", use_container_width=True, type="primary"):
-                if not doc_content.strip():
-                    st.error("Please paste some content to summarize!")
-                elif len(doc_content.strip()) < 100:
+            generate = st.button("🤖 Generate Summary", use_container_width=True, type="primary")
+            force_summary = st.session_state.pop("force_summary", False)
+            if generate or force_summary:
+                if uploaded_file is None and not doc_content.strip():
+                    st.error("Please paste some content or upload a file to summarize!")
+                elif uploaded_file is None and len(doc_content.strip()) < 100:
                     st.warning("Please provide more content for a meaningful summary (minimum 100 characters)")
                 else:
-                    with st.spinner("🔍 Analyzing document with AI..."):
-                        summary = summarize_document(doc_content, doc_type.lower())
+                    preview = document_preview(uploaded_file) if uploaded_file is not None else doc_content
+                    content_preview = preview[:500] + "..." if len(preview) > 500 else preview
+                    fingerprint = source_fingerprint(uploaded_file, doc_content)
+                    # Offer an earlier summary of the same document before paying for a new one
+                    earlier = None if force_summary else get_summary_index().find_duplicate(corpus.summaries, fingerprint)
+                    
+                    if earlier:
+                        st.info(f"📎 This document was already summarized: **{earlier['title']}** "
+                                f"({earlier['timestamp'].strftime('%Y-%m-%d %H:%M')})")
+                        st.markdown("### 📊 Summary")
+                        st.markdown(earlier['summary'])
+                        st.button("🤖 Summarize Anyway", use_container_width=True,
+                                  on_click=st.session_state.__setitem__, args=("force_summary", True))
+                    else:
+                        extraction = st.empty()
+                        progress = st.empty()
+                        def show_progress(done, total):
+                            if total is None:
+                                progress.caption(f"Summarized part {done} (still reading the document)")
+                            else:
+                                progress.progress(done / total, text=f"Summarized part {done} of {total}")
                         
-                        # Save to session state and local storage
-                        summary_obj = {
-                            'id': st.session_state.summary_counter,
-                            'title': doc_title or f"Document {st.session_state.summary_counter}",
-                            'type': doc_type,
-                            'content': doc_content[:500] + "..." if len(doc_content) > 500 else doc_content,
-                            'summary': summary,
-                            'timestamp': datetime.now()
-                        }
+                        if uploaded_file is not None:
+                            # Pages are extracted lazily as the summarizer consumes them
+                            source = iter_document_text(
+                                uploaded_file,
+                                on_progress=lambda done, total: extraction.progress(
+                                    done / total, text=f"Extracted page {done} of {total}"
+                                )
+                            )
+                            doc_title = doc_title or uploaded_file.name
+                        else:
+                            source = doc_content
                         
-                        st.session_state.summaries.append(summary_obj)
-                        st.session_state.summary_counter += 1
-                        save_summaries(st.session_state.summaries)
+                        try:
+                            if stream_output:
+                                st.markdown("### 📊 Summary")
+                                with st.spinner("🔍 Analyzing document with AI..."):
+                                    summary = st.write_stream(
+                                        stream_summary(source, doc_type.lower(), show_progress)
+                                    )
+                            else:
+                                with st.spinner("🔍 Analyzing document with AI..."):
+                                    summary = summarize_document(source, doc_type.lower(), show_progress)
+                        except Exception as e:
+                            # Nothing is saved, so a partial stream or an error never enters the history
+                            summary = None
+                            st.error(f"Error generating summary: {str(e)}")
+                        extraction.empty()
+                        progress.empty()
                         
-                        st.success("✅ Summary generated successfully!")
-                        st.markdown("### 📊 Summary")
-                        st.markdown(summary)
-                        st.balloons()
+                        if summary is not None:
+                            # Save to the shared corpus and local storage
+                            corpus.add_summary({
+                                'title': doc_title or f"Document {len(corpus.summaries) + 1}",
+                                'type': doc_type,
+                                'content': content_preview,
+                                'source_hash': fingerprint,
+                                'summary': summary,
+                                'timestamp': datetime.now()
+                            })
+                        
+                            st.success("✅ Summary generated successfully!")
+                            if not stream_output:
+                                st.markdown("### 📊 Summary")
+                                st.markdown(summary)
+                            st.balloons()
     
     with tab2:
         st.markdown("### 📜 Summary History")
         
-        if not st.session_state.summaries:
+        if not corpus.summaries:
             st.info("No summaries yet. Create your first summary!")
         else:
-            for summary in reversed(st.session_state.summaries):
-                with st.expander(f"📄 {summary['title']} - {summary['type']} ({summary['timestamp'].strftime('%Y-%m-%d %H:%M')})"):
+            history_query = st.text_input(
+                "🔎 Search past summaries",
+                placeholder="e.g., Q3 debt covenant risks"
+            )
+            if history_query.strip():
+                try:
+                    results = synced_summary_index().search(history_query)
+                    if not results:
+                        st.info("No summaries match your search.")
+                except Exception as e:
+                    st.error(f"Search is unavailable right now: {str(e)}")
+                    results = []
+                history = [summary for summary, _ in results]
+                scores = [f" · {score:.0%} match" for _, score in results]
+            else:
+                history = paginate("summaries", corpus.summaries)
+                scores = [""] * len(history)
+            
+            for summary, score in zip(history, scores):
+                with st.expander(f"📄 {summary['title']} - {summary['type']} ({summary['timestamp'].strftime('%Y-%m-%d %H:%M')}){score}"):
                     st.markdown("**Original Content (Preview):**")
                     st.text(summary['content'])
                     st.markdown("---")
@@ -601,60 +1974,66 @@ elif page == "📊 Market Alerts":
     col1, col2, col3 = st.columns([1, 3, 1])
     with col1:
         if st.button("🔄 Refresh Data", use_container_width=True):
-            st.cache_data.clear()
+            with st.spinner("📡 Fetching latest market news and analyzing impact..."):
+                news_poller.refresh(timeout=120)
             st.rerun()
     
+    # Read the latest snapshot published by the background poller
+    with st.spinner("📡 Fetching latest market news and analyzing impact..."):
+        snapshot = news_poller.wait(timeout=120)
+    
     with col3:
-        st.markdown(f"*Last updated: {datetime.now().strftime('%H:%M:%S')}*")
+        if snapshot and snapshot['updated_at']:
+            st.markdown(f"*Last updated: {snapshot['updated_at'].strftime('%H:%M:%S')}*")
     
     st.markdown("---")
     
-    # Fetch and display alerts
-    with st.spinner("📡 Fetching latest market news and analyzing impact..."):
-        news = fetch_news()
-        
-        if not news:
-            st.error("Unable to fetch news. Please check your internet connection or try again later.")
+    if snapshot is None:
+        st.info("⏳ Market news is still loading. Please check back in a moment.")
+    elif snapshot['error'] and not snapshot['alerts']:
+        st.error(snapshot['error'])
+    elif not snapshot['headlines']:
+        st.error("Unable to fetch news. Please check your internet connection or try again later.")
+    else:
+        if snapshot['error']:
+            st.warning(f"Showing the last successful update. {snapshot['error']}")
+        alerts = snapshot['alerts']
+        if not alerts:
+            st.warning("No significant market-moving news at the moment.")
         else:
-            alert_lines = get_stock_alerts(news)
-            alerts = parse_alerts(alert_lines)
+            st.success(f"📰 Found {len(alerts)} market alerts")
             
-            if not alerts:
-                st.warning("No significant market-moving news at the moment.")
-            else:
-                st.success(f"📰 Found {len(alerts)} market alerts")
+            for alert in alerts:
+                impact_lower = alert['impact'].lower()
                 
-                for alert in alerts:
-                    impact_lower = alert['impact'].lower()
-                    
-                    if 'positive' in impact_lower:
-                        icon = "🟢"
-                        card_class = "alert-positive"
-                        badge_color = "#10B981"
-                    elif 'negative' in impact_lower:
-                        icon = "🔴"
-                        card_class = "alert-negative"
-                        badge_color = "#EF4444"
-                    else:
-                        icon = "⚪"
-                        card_class = "alert-neutral"
-                        badge_color = "#6B7280"
-                    
-                    st.markdown(f"""
-                    <div class="alert-card {card_class}">
-                        <h3 style="margin-top: 0; color: #1E293B;">{icon} {alert['headline']}</h3>
-                        <p style="margin: 0.5rem 0;"><strong>📈 Affected:</strong> {alert['stock']}</p>
-                        <p style="margin: 0.5rem 0;">
-                            <strong>Impact:</strong> 
-                            <span style="background-color: {badge_color}; color: white; padding: 0.25rem 0.75rem; border-radius: 12px; font-size: 0.85rem;">
-                                {alert['impact']}
-                            </span>
-                        </p>
-                        <p style="margin: 0.75rem 0 0 0; color: #475569; line-height: 1.6;">
-                            <strong>💡 Analysis:</strong> {alert['summary']}
-                        </p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                if 'positive' in impact_lower:
+                    icon = "🟢"
+                    card_class = "alert-positive"
+                    badge_color = "#10B981"
+                elif 'negative' in impact_lower:
+                    icon = "🔴"
+                    card_class = "alert-negative"
+                    badge_color = "#EF4444"
+                else:
+                    icon = "⚪"
+                    card_class = "alert-neutral"
+                    badge_color = "#6B7280"
+                
+                st.markdown(f"""
+                <div class="alert-card {card_class}">
+                    <h3 style="margin-top: 0; color: #1E293B;">{icon} {alert['headline']}</h3>
+                    <p style="margin: 0.5rem 0;"><strong>📈 Affected:</strong> {alert['stock']}</p>
+                    <p style="margin: 0.5rem 0;">
+                        <strong>Impact:</strong> 
+                        <span style="background-color: {badge_color}; color: white; padding: 0.25rem 0.75rem; border-radius: 12px; font-size: 0.85rem;">
+                            {alert['impact']}
+                        </span>
+                    </p>
+                    <p style="margin: 0.75rem 0 0 0; color: #475569; line-height: 1.6;">
+                        <strong>💡 Analysis:</strong> {alert['summary']}
+                    </p>
+                </div>
+                """, unsafe_allow_html=True)
 
 # ============================================
 # PAGE 4: BLOG RATING
@@ -664,16 +2043,16 @@ elif page == "✍️ Blog Rating":
     st.markdown("Create and rate finance blogs using advanced sentiment analysis and AI")
     
     # Tabs
-    tab1, tab2 = st.tabs(["📋 All Blogs", "➕ Create Blog"])
+    tab1, tab2, tab3 = st.tabs(["📋 All Blogs", "➕ Create Blog", "🛠️ Admin"])
     
     # Tab 1: Blog List
     with tab1:
         st.subheader("📚 Published Blogs")
         
-        if not st.session_state.blogs:
+        if not corpus.blogs:
             st.info("No blogs yet. Create your first blog in the 'Create Blog' tab!")
         else:
-            for blog in reversed(st.session_state.blogs):
+            for blog in paginate("blogs", corpus.blogs):
                 with st.container():
                     col1, col2 = st.columns([4, 1])
                     
@@ -720,11 +2099,10 @@ elif page == "✍️ Blog Rating":
                 else:
                     # Rate the blog
                     with st.spinner("🤖 Rating your blog with AI..."):
-                        rating = rate_blog(content)
+                        rating, rating_source = rate_blog(content)
                     
                     # Create blog object
-                    new_blog = {
-                        'id': st.session_state.blog_counter,
+                    corpus.add_blog({
                         'user_name': user_name,
                         'title': title,
                         'content': content,
@@ -732,16 +2110,72 @@ elif page == "✍️ Blog Rating":
                         'time': datetime.now(),
                         'likes': 0,
                         'comments': 0,
-                        'rating': rating
-                    }
-                    
-                    st.session_state.blogs.append(new_blog)
-                    st.session_state.blog_counter += 1
-                    save_blogs(st.session_state.blogs)
+                        'rating': rating,
+                        'rating_source': rating_source
+                    })
                     
                     st.success(f"✅ Blog published successfully! AI Rating: {rating}/5 {'⭐' * rating}")
+                    st.caption(f"Rated by: {rating_source}")
                     st.balloons()
                     st.info("💡 Your blog has been saved and is now visible in the 'All Blogs' tab!")
+    
+    # Tab 3: Admin
+    with tab3:
+        # Both actions spend Gemini quota, so they are kept away from anonymous visitors
+        if not ADMIN_PASSWORD:
+            st.info("🔒 Admin actions are disabled. Set ADMIN_PASSWORD to enable them.")
+        elif not hmac.compare_digest(
+            st.text_input("Admin password", type="password", key="admin_password").encode(),
+            ADMIN_PASSWORD.encode()
+        ):
+            st.info("🔒 Enter the admin password to re-rate or import blogs.")
+        else:
+            st.subheader("🔁 Re-rate All Blogs")
+            st.markdown(f"Re-score all {len(corpus.blogs)} blogs, packing many posts into each Gemini request.")
+            
+            if st.button("🔁 Re-rate All Blogs", use_container_width=True, disabled=not corpus.blogs):
+                blogs = corpus.blogs
+                progress = st.progress(0.0, text="Re-rating blogs...")
+                start = time.monotonic()
+                ratings = rate_blogs(
+                    [blog['content'] for blog in blogs],
+                    on_progress=lambda done, total: progress.progress(done / total, text=f"Rated {done} of {total} blogs"),
+                    require_gemini=True
+                )
+                # Blogs Gemini didn't rate keep their existing rating and source
+                updates = {
+                    blog['id']: {'rating': result[0], 'rating_source': result[1]}
+                    for blog, result in zip(blogs, ratings) if result is not None
+                }
+                changed = sum(1 for blog in blogs if blog['id'] in updates and blog['rating'] != updates[blog['id']]['rating'])
+                if updates:
+                    corpus.update_blogs(updates)
+                progress.empty()
+                st.success(f"✅ Re-rated {len(updates)} blogs in {time.monotonic() - start:.1f}s ({changed} ratings changed)")
+                if len(updates) < len(blogs):
+                    st.warning(f"⚠️ Gemini returned no rating for {len(blogs) - len(updates)} blogs; "
+                               "their existing ratings were kept.")
+            
+            st.markdown("---")
+            st.subheader("📥 Bulk Import")
+            st.markdown("Import blogs from a CSV or JSONL export with `user_name`, `title`, `content` "
+                        "and optional `tag`, `time`, `likes`, `comments` fields. "
+                        "Interrupted imports resume when the same file is imported again.")
+            
+            import_file = st.file_uploader("Upload CSV or JSONL", type=["csv", "jsonl"], key="blog_import")
+            if st.button("📥 Import Blogs", use_container_width=True, disabled=import_file is None):
+                status = st.empty()
+                start = time.monotonic()
+                result = import_blogs(
+                    import_file,
+                    on_progress=lambda checkpoint, per_second: status.info(
+                        f"⏳ Imported {checkpoint['imported']} blogs "
+                        f"({checkpoint['offset']} records read, {per_second:.1f} blogs/s)"
+                    )
+                )
+                status.empty()
+                st.success(f"✅ Import complete: {result['imported']} blogs imported, "
+                           f"{result['skipped']} records skipped ({time.monotonic() - start:.1f}s)")
 
 # ============================================
 # FOOTER
@@ -0,0 +1,150 @@
+"""Append-only, checksummed record log used as the default blog store."""
+import os
+import pickle
+import shutil
+import struct
+import threading
+import zlib
+
+
+class BlogLog:
+    """Append-only blog log. Each record is framed as a header (marker,
+    length, CRC-32), the pickle, and a length footer, so the newest records
+    can be read from the end of the file and a damaged frame can be detected.
+    """
+    HEADER = struct.Struct("<4sII")
+    FOOTER = struct.Struct("<I")
+    MARKER = b"BLG1"
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        if path.exists():
+            self._end = self._recover()
+        else:
+            self._end = 0
+            if legacy_path is not None and legacy_path.exists():
+                # rewrite() creates the log atomically, so a crash mid-migration
+                # leaves no log behind and the import is retried on next start
+                with open(legacy_path, "rb") as f:
+                    self.rewrite(pickle.load(f))
+
+    def _frame(self, record):
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        header = self.HEADER.pack(self.MARKER, len(payload), zlib.crc32(payload))
+        return header + payload + self.FOOTER.pack(len(payload))
+
+    def _frame_end(self, data, pos):
+        """End offset of the intact frame starting at `pos` in `data`, or None"""
+        if len(data) - pos < self.HEADER.size + self.FOOTER.size:
+            return None
+        marker, size, crc = self.HEADER.unpack_from(data, pos)
+        start = pos + self.HEADER.size
+        end = start + size + self.FOOTER.size
+        if marker != self.MARKER or end > len(data):
+            return None
+        if zlib.crc32(data[start:start + size]) != crc or self.FOOTER.unpack_from(data, start + size)[0] != size:
+            return None
+        return end
+
+    def _recover(self):
+        """Check the log on open and return the offset of its end.
+
+        A damaged frame with nothing intact after it is a partial append
+        from a crash, and is truncated away. Damage followed by intact
+        frames is corruption: the file is copied aside to `<name>.corrupt`
+        and the log is rebuilt from every intact frame, so nothing
+        readable is ever dropped.
+        """
+        with open(self.path, "rb") as f:
+            data = memoryview(f.read())
+        pos = 0
+        while (end := self._frame_end(data, pos)) is not None:
+            pos = end
+        if pos == len(data):
+            return pos
+        
+        salvaged = []
+        found = data.obj.find(self.MARKER, pos + 1)
+        while found != -1:
+            end = self._frame_end(data, found)
+            if end is None:
+                found = data.obj.find(self.MARKER, found + 1)
+            else:
+                salvaged.append(data[found:end])
+                found = data.obj.find(self.MARKER, end)
+        
+        if not salvaged:
+            print(f"⚠️ {self.path}: discarding a partial record after byte {pos}")
+            with open(self.path, "r+b") as f:
+                f.truncate(pos)
+                f.flush()
+                os.fsync(f.fileno())
+            return pos
+        
+        backup = self.path.with_name(self.path.name + ".corrupt")
+        shutil.copy2(self.path, backup)
+        print(f"⚠️ {self.path}: damaged record at byte {pos}; kept {len(salvaged)} intact "
+              f"record(s) after it, original copied to {backup}")
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data[:pos])
+            for frame in salvaged:
+                f.write(frame)
+            f.flush()
+            os.fsync(f.fileno())
+            end = f.tell()
+        os.replace(tmp, self.path)
+        return end
+
+    def append(self, records):
+        """Write records to the end of the log in a single write"""
+        frames = b"".join(self._frame(record) for record in records)
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(frames)
+                f.flush()
+                os.fsync(f.fileno())
+            self._end += len(frames)
+
+    def rewrite(self, records):
+        """Replace the whole log with `records` (oldest first)"""
+        tmp = self.path.with_suffix(".tmp")
+        with self._lock:
+            with open(tmp, "wb") as f:
+                for record in records:
+                    f.write(self._frame(record))
+                f.flush()
+                os.fsync(f.fileno())
+                end = f.tell()
+            os.replace(tmp, self.path)
+            self._end = end
+
+    def _iter_reverse(self):
+        # Only read up to the last committed append, never a frame in progress
+        pos = self._end
+        if not pos:
+            return
+        with open(self.path, "rb") as f:
+            while pos > 0:
+                f.seek(pos - self.FOOTER.size)
+                (size,) = self.FOOTER.unpack(f.read(self.FOOTER.size))
+                start = pos - self.FOOTER.size - size - self.HEADER.size
+                if start < 0:
+                    break
+                f.seek(start)
+                marker, header_size, crc = self.HEADER.unpack(f.read(self.HEADER.size))
+                payload = f.read(size)
+                if marker != self.MARKER or header_size != size or zlib.crc32(payload) != crc:
+                    break
+                yield pickle.loads(payload)
+                pos = start
+
+    def iter_latest(self):
+        """Yield the latest version of each record, newest first"""
+        seen = set()
+        for record in self._iter_reverse():
+            if record['id'] in seen:
+                continue
+            seen.add(record['id'])
+            yield record
@@ -0,0 +1,553 @@
+"""Finance glossary: a versioned JSON dataset compiled to SQLite with hot
+reload, a BM25F inverted index with typo-tolerant matching, prefix-trie
+autocomplete, and an approximate counter of the most looked-up terms.
+"""
+import atexit
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+
+TOKEN = re.compile(r"[\w\u0900-\u097f]+")  # \w splits Devanagari at vowel signs
+
+# BM25 parameters and per-field weights (a term-name hit outranks a definition hit)
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_WEIGHTS = {"term": 3.0, "translations": 1.5, "definition": 1.0}
+PHRASE_BOOST = 1.5  # adjacent query words that appear together in an entry
+PREFIX_WEIGHT = 0.8  # expansions of the last, possibly unfinished, query word
+MAX_PREFIX_EXPANSIONS = 50
+FUZZY_MIN_LENGTH = 4  # shorter words are too ambiguous to correct
+COMPLETIONS_PER_NODE = 10  # most completions a prefix lookup can return
+
+
+def fold(text):
+    """Lowercase `text` and drop accents from Latin letters ("Bénéfice" -> "benefice").
+    Combining marks on other scripts (e.g. Devanagari vowel signs) are kept."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    kept, previous = [], ""
+    for char in decomposed:
+        if unicodedata.combining(char) and previous.isascii():
+            continue
+        kept.append(char)
+        previous = char
+    return unicodedata.normalize("NFC", "".join(kept))
+
+
+def tokenize(text):
+    return TOKEN.findall(fold(text))
+
+
+def parse_entry(entry):
+    """Split a glossary value "Hindi / French / Spanish - definition" into
+    (translations, definition)"""
+    translations, sep, definition = entry.partition(" - ")
+    if not sep:
+        return [], entry
+    return [t.strip() for t in translations.split(" / ")], definition.strip()
+
+
+def trigrams(word):
+    padded = f"^{word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance between `a` and `b`, or limit + 1
+    once it is known to exceed `limit`"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class PrefixTrie:
+    """Path-compressed trie over term names for autocomplete.
+
+    Every name is inserted from its start and from the start of each later
+    word, so "flo" completes to "Cash Flow". Each node stores its best
+    completions, ranked names-that-start-with-the-prefix first, then
+    shorter and alphabetically earlier names, so a lookup only walks the
+    prefix: O(len(prefix)) whatever the number of terms.
+    """
+
+    class Node:
+        __slots__ = ("edges", "top", "terms")
+
+        def __init__(self):
+            self.edges = {}  # first char -> (edge label, child)
+            self.top = ()  # best term ids in this subtree
+            self.terms = None  # (rank, term id)s of keys ending here
+
+    def __init__(self, terms, per_node=COMPLETIONS_PER_NODE):
+        self.terms = list(terms)
+        self.per_node = per_node
+        self.root = self.Node()
+        for term_id, term in enumerate(self.terms):
+            key = fold(term)
+            words = [m.start() for m in TOKEN.finditer(key)] or [0]
+            for start in dict.fromkeys([0] + words):
+                rank = (start > 0, len(term), key)
+                self._insert(key[start:], (rank, term_id))
+        self._rank(self.root)
+
+    def _insert(self, key, entry):
+        node, i = self.root, 0
+        while i < len(key):
+            edge = node.edges.get(key[i])
+            if edge is None:
+                leaf = self.Node()
+                node.edges[key[i]] = (key[i:], leaf)
+                node, i = leaf, len(key)
+                break
+            label, child = edge
+            if key.startswith(label, i):
+                node, i = child, i + len(label)
+                continue
+            common = 1
+            while i + common < len(key) and label[common] == key[i + common]:
+                common += 1
+            # Split the edge where the key diverges from it
+            middle = self.Node()
+            middle.edges[label[common]] = (label[common:], child)
+            node.edges[key[i]] = (label[:common], middle)
+            node, i = middle, i + common
+        if node.terms is None:
+            node.terms = []
+        node.terms.append(entry)
+
+    def _rank(self, node):
+        """Fill in `top` bottom-up and return the node's best (rank, term id)s"""
+        entries = node.terms or []
+        for _, child in node.edges.values():
+            entries.extend(self._rank(child))
+        best = {}
+        for rank, term_id in sorted(entries):
+            best.setdefault(term_id, rank)
+            if len(best) == self.per_node:
+                break
+        node.terms = None
+        node.top = tuple(best)
+        return [(rank, term_id) for term_id, rank in best.items()]
+
+    def complete(self, prefix, limit=COMPLETIONS_PER_NODE):
+        """Up to `limit` term names completing `prefix` (case/accent-insensitive), best first"""
+        prefix = fold(prefix).lstrip()
+        if not prefix:
+            return []
+        node, i = self.root, 0
+        while i < len(prefix):
+            edge = node.edges.get(prefix[i])
+            if edge is None:
+                return []
+            label, child = edge
+            rest = prefix[i:i + len(label)]
+            if not label.startswith(rest):
+                return []
+            node, i = child, i + len(label)
+        return [self.terms[term_id] for term_id in node.top[:limit]]
+
+
+class GlossaryIndex:
+    """Inverted index over glossary terms, translations and definitions.
+
+    Postings map each word (and each pair of adjacent words in a term or
+    its translations) to the entries containing it, with a precomputed
+    BM25F weight. Queries are matched
+    exactly, by prefix (for the word being typed) and, failing both, by
+    trigram candidates within a small edit distance, so "divident" still
+    finds "Dividend".
+    """
+
+    def __init__(self, terms):
+        """`terms` is a mapping or iterable of (term, entry) pairs; entries are
+        not kept, only the terms and postings"""
+        self.terms = []
+        fields = []
+        for term, entry in terms.items() if hasattr(terms, "items") else terms:
+            self.terms.append(term)
+            translations, definition = parse_entry(entry)
+            fields.append({
+                "term": tokenize(term),
+                "translations": tokenize(" ".join(translations)),
+                "definition": tokenize(definition),
+            })
+
+        average = {
+            name: sum(len(f[name]) for f in fields) / max(len(fields), 1) or 1
+            for name in FIELD_WEIGHTS
+        }
+        weighted_tf = defaultdict(dict)  # key -> {doc: BM25F-normalized tf}
+        for doc, doc_fields in enumerate(fields):
+            for name, tokens in doc_fields.items():
+                norm = 1 - BM25_B + BM25_B * len(tokens) / average[name]
+                keys = Counter(tokens)
+                if name != "definition":  # phrase postings for names only keep the index small
+                    keys.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+                for key, tf in keys.items():
+                    postings = weighted_tf[key]
+                    postings[doc] = postings.get(doc, 0.0) + FIELD_WEIGHTS[name] * tf / norm
+
+        self.postings = {}
+        for key, postings in weighted_tf.items():
+            idf = math.log(1 + (len(fields) - len(postings) + 0.5) / (len(postings) + 0.5))
+            self.postings[key] = [
+                (doc, idf * tf * (BM25_K1 + 1) / (tf + BM25_K1)) for doc, tf in postings.items()
+            ]
+
+        self.vocabulary = sorted(key for key in self.postings if " " not in key)
+        self.trigram_index = defaultdict(list)
+        for word in self.vocabulary:
+            for gram in trigrams(word):
+                self.trigram_index[gram].append(word)
+        self.by_name = {fold(term).strip(): doc for doc, term in enumerate(self.terms)}
+        self.trie = PrefixTrie(self.terms)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def lookup(self, query):
+        """The glossary term named exactly `query` (ignoring case/accents), or None"""
+        doc = self.by_name.get(fold(query).strip())
+        return None if doc is None else self.terms[doc]
+
+    def complete(self, prefix, limit=COMPLETIONS_PER_NODE):
+        """Term names completing `prefix`, best first"""
+        return self.trie.complete(prefix, limit)
+
+    def expand(self, word, prefix=False):
+        """[(vocabulary word, weight)] that `word` should match"""
+        expansions = {}
+        if word in self.postings:
+            expansions[word] = 1.0
+        if prefix:
+            start = bisect_left(self.vocabulary, word)
+            for candidate in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+                if not candidate.startswith(word):
+                    break
+                expansions.setdefault(candidate, PREFIX_WEIGHT)
+        if not expansions and len(word) >= FUZZY_MIN_LENGTH:
+            limit = 1 if len(word) <= 6 else 2
+            grams = trigrams(word)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self.trigram_index.get(gram, ()))
+            needed = len(grams) - 3 * limit
+            for candidate, count in shared.items():
+                if count >= needed:
+                    distance = edit_distance(word, candidate, limit)
+                    if distance <= limit:
+                        expansions[candidate] = 1.0 / (1 + distance)
+        return list(expansions.items())
+
+    def search(self, query, limit=5):
+        """Rank entries for `query`; returns ([(term, score)] best first, total matches)"""
+        words = tokenize(query)
+        scores = defaultdict(float)
+        for position, word in enumerate(words):
+            for key, weight in self.expand(word, prefix=position == len(words) - 1):
+                for doc, score in self.postings[key]:
+                    scores[doc] += weight * score
+        for pair in zip(words, words[1:]):
+            for doc, score in self.postings.get(" ".join(pair), ()):
+                scores[doc] += PHRASE_BOOST * score
+
+        doc = self.by_name.get(fold(query).strip())
+        if doc is not None:
+            scores[doc] = max(scores.values(), default=0.0) + 1.0
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self.terms[doc], score) for doc, score in best], len(scores)
+
+
+class GlossaryStore:
+    """Glossary dataset compiled from a versioned JSON source into SQLite.
+
+    The source is {"version": n, "terms": {term: entry}}. It is compiled
+    once into `path` (reused by every process while the source is
+    unchanged) and read through memory-mapped connections, so entries live
+    in the shared page cache rather than in each process. `refresh()`
+    recompiles when the source file changes; the search index is rebuilt
+    on next use.
+    """
+
+    MMAP_SIZE = 256 * 1024 * 1024
+    SCHEMA = """
+    CREATE TABLE terms (
+        name TEXT PRIMARY KEY,
+        entry TEXT NOT NULL
+    ) WITHOUT ROWID;
+    CREATE TABLE meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, source, path):
+        self.source = Path(source)
+        self.path = Path(path)
+        self.signature = None  # source "mtime_ns:size" the current data was compiled from
+        self.version = None
+        self._rejected = None  # signature of the last source that failed to compile
+        self._error = None  # last reload error reported, so it is logged once
+        self._count = 0
+        self._index = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.refresh()
+
+    def _source_signature(self):
+        stat = self.source.stat()
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _compiled_meta(self):
+        """meta table of the compiled file, or {} if it is missing or unreadable"""
+        try:
+            conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+            try:
+                return dict(conn.execute("SELECT key, value FROM meta"))
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return {}
+
+    def _compile(self, signature):
+        with open(self.source, encoding="utf-8") as f:
+            data = json.load(f)
+        if not all(isinstance(k, str) and isinstance(v, str) for k, v in data["terms"].items()):
+            raise ValueError("terms must map each name to an entry string")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".db")
+        os.close(fd)
+        try:
+            conn = sqlite3.connect(tmp)
+            with conn:
+                conn.executescript(self.SCHEMA)
+                conn.executemany("INSERT OR REPLACE INTO terms VALUES (?, ?)", data["terms"].items())
+                conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                    ("version", str(data.get("version", 0))),
+                    ("source", signature),
+                ])
+            conn.close()
+            os.replace(tmp, self.path)  # readers keep the old file until they reconnect
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def refresh(self):
+        """Pick up changes to the source file; True if the data was reloaded.
+
+        A source that can't be read, parsed or compiled (say, caught half
+        saved) is reported and skipped, and the last good compiled data
+        keeps being served until the file is fixed.
+        """
+        try:
+            signature = self._source_signature()
+        except OSError as e:
+            signature, error = None, e
+        else:
+            if signature in (self.signature, self._rejected):
+                return False
+        with self._lock:
+            if signature is not None:
+                if signature in (self.signature, self._rejected):
+                    return False
+                meta = self._compiled_meta()
+                if meta.get("source") == signature:
+                    self._load(meta)
+                    return True
+                try:
+                    self._compile(signature)
+                except Exception as e:
+                    error = e
+                else:
+                    self._load(self._compiled_meta())
+                    return True
+            if self.signature is None:
+                # Nothing loaded yet: serve what an earlier run compiled, if anything
+                meta = self._compiled_meta()
+                if not meta:
+                    raise error
+                self._load(meta)
+            if repr(error) != self._error:
+                print(f"⚠️ Glossary {self.source} not reloaded, keeping the last good data: {error!r}")
+            self._error = repr(error)
+            if signature is not None:
+                self._rejected = signature
+        return False
+
+    def _load(self, meta):
+        signature = meta["source"]
+        self.version = int(meta["version"])
+        self._count = self._conn(signature).execute("SELECT COUNT(*) FROM terms").fetchone()[0]
+        self._index = None
+        self.signature = signature
+        self._error = None
+
+    def _conn(self, signature=None):
+        # One read-only connection per thread, reopened after a reload so
+        # it sees the newly compiled file
+        signature = signature or self.signature
+        cached = getattr(self._local, "conn", None)
+        if cached is None or cached[0] != signature:
+            if cached is not None:
+                cached[1].close()
+            conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+            conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+            cached = self._local.conn = (signature, conn)
+        return cached[1]
+
+    def __len__(self):
+        return self._count
+
+    def get(self, term):
+        """Entry text for `term`, or None"""
+        row = self._conn().execute("SELECT entry FROM terms WHERE name = ?", (term,)).fetchone()
+        return row[0] if row else None
+
+    def items(self):
+        return self._conn().execute("SELECT name, entry FROM terms")
+
+    def index(self):
+        """GlossaryIndex over the current data, built on first use after each reload"""
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = GlossaryIndex(self.items())
+                index = self._index
+        return index
+
+
+class PopularityCounter:
+    """Approximate counts of the most looked-up glossary terms, shared by all sessions.
+
+    record() only appends to a deque, which is atomic, so page code never
+    takes a lock. Pending lookups are folded into a Space-Saving summary of
+    at most `capacity` terms by whichever caller next reads the top terms;
+    a caller that finds the fold in progress elsewhere just reads the last
+    summary. Counts are an over-estimate by at most the count a term
+    inherited on eviction, and any term looked up more than
+    total / capacity times is guaranteed to be tracked.
+
+    When `path` is set, changed counts are written there (JSON) by a
+    background thread every `flush_interval` seconds and on exit, and
+    reloaded on start.
+    """
+
+    def __init__(self, path=None, capacity=256, flush_interval=30):
+        self.path = Path(path) if path is not None else None
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self._pending = deque()
+        self._counts = {}  # term -> count
+        self._fold_lock = threading.Lock()
+        self._dirty = False  # counts changed since the last flush
+        if self.path is not None:
+            self._load()
+            atexit.register(self.flush)
+            threading.Thread(target=self._flush_periodically, name="glossary_popularity", daemon=True).start()
+
+    def record(self, term):
+        self._pending.append(term)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def _fold(self):
+        """Move pending lookups into the summary (caller holds _fold_lock)"""
+        counts = self._counts
+        if self._pending:
+            self._dirty = True
+        while self._pending:
+            term = self._pending.popleft()
+            if term in counts:
+                counts[term] += 1
+            elif len(counts) < self.capacity:
+                counts[term] = 1
+            else:
+                # Replace the least counted term, inheriting its count
+                evicted = min(counts, key=counts.get)
+                counts[term] = counts.pop(evicted) + 1
+
+    def top(self, k):
+        """[(term, count)] of the `k` most looked-up terms, most first"""
+        if self._fold_lock.acquire(blocking=False):
+            try:
+                self._fold()
+            finally:
+                self._fold_lock.release()
+        return heapq.nlargest(k, list(self._counts.items()), key=lambda item: item[1])
+
+    def flush(self):
+        if self.path is None:
+            return
+        with self._fold_lock:
+            self._fold()
+            if not self._dirty:
+                return
+            self._dirty = False
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._counts, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                counts = json.load(f)
+        except (OSError, ValueError):
+            return
+        best = heapq.nlargest(self.capacity, counts.items(), key=lambda item: item[1])
+        self._counts = {term: int(count) for term, count in best}
+
+
+if __name__ == "__main__":
+    # Autocomplete/search latency on a synthetic glossary: python glossary.py [terms]
+    import random
+    import sys
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    random.seed(0)
+    syllables = ["ca", "pi", "tal", "mar", "ket", "fund", "bond", "yi", "eld", "ra", "te", "div", "i", "dend", "flo", "w"]
+    words = list({"".join(random.choices(syllables, k=random.randint(1, 4))) for _ in range(20_000)})
+    terms = {}
+    while len(terms) < size:
+        name = " ".join(random.choices(words, k=random.randint(1, 3))).title()
+        terms[name] = "हिंदी / Français / Español - " + " ".join(random.choices(words, k=10))
+
+    start = time.perf_counter()
+    index = GlossaryIndex(terms)
+    print(f"{len(index)} terms, index + trie built in {time.perf_counter() - start:.1f}s")
+    for label, queries, run in [
+        ("complete", ["c", "ca", "capi", "capital", "mar ket", "zzz"], lambda q: index.complete(q, 8)),
+        ("search", ["capital", "divdend", "bond yield", "c"], lambda q: index.search(q)),
+    ]:
+        for query in queries:
+            rounds = 1000
+            start = time.perf_counter()
+            for _ in range(rounds):
+                run(query)
+            print(f"{label:8} {query!r:14} {(time.perf_counter() - start) / rounds * 1e6:8.1f} us")
@@ -0,0 +1,10 @@
+"""Text extraction for a range of PDF pages, the unit of work the document
+summarizer hands to its process pool.
+"""
+from PyPDF2 import PdfReader
+
+
+def extract_page_range(path, start, stop):
+    """Text of pages [start, stop) of the PDF at `path`"""
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
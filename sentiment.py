@@ -0,0 +1,171 @@
+"""Pattern-lexicon polarity scorer that reproduces TextBlob's sentiment
+polarity without building a TextBlob per document.
+"""
+import re
+
+
+class SentimentLexicon:
+    """Polarity scorer that reproduces `TextBlob(text).sentiment.polarity`.
+
+    TextBlob's pattern lexicon is compiled once into a flat dict of
+    word -> (polarity, intensity, is_adverb) and documents are scored by a
+    single pass over their tokens, using the same tokenizer rules,
+    modifier/negation handling, "!" boost and emoticons as the pattern
+    analyzer, without building a TextBlob per document.
+    """
+
+    NEGATIONS = frozenset(("no", "not", "n't", "never"))
+    PUNCTUATION = ",;:!?()[]{}`''\"@#$^&*+-|=~_"  # periods are split separately
+    SENTENCE_ENDS = frozenset(("...", ".", "!", "?", "END-OF-SENTENCE"))
+    SENTENCE_TAILS = frozenset(("”", "’", "...", ".", "!", "?", ")", "END-OF-SENTENCE"))
+    QUOTES = ("“", "”", "‘", "’", "'", '"')
+    CONTRACTIONS = re.compile(r"('d|'m|'s|'ll|'re|'ve|n't)")
+    LINEBREAKS = re.compile(r"\n{2,}")
+
+    def __init__(self, words, emoticons, abbreviations, abbreviation_patterns, sarcasm, emoticon_pattern):
+        self.words = words
+        self.emoticons = emoticons
+        self.abbreviations = abbreviations
+        self.abbreviation_patterns = abbreviation_patterns
+        self.sarcasm = sarcasm
+        self.emoticon_pattern = emoticon_pattern
+        self.token_edges = set(self.PUNCTUATION)
+
+    @classmethod
+    def from_pattern(cls):
+        """Compile the lexicon TextBlob's PatternAnalyzer uses (en-sentiment.xml)"""
+        from textblob import _text
+        from textblob.en import sentiment
+
+        words = {
+            word: (senses[None][0], senses[None][2], "RB" in senses)
+            for word, senses in sentiment.items()
+        }
+        emoticons = {}
+        for (_, polarity), faces in _text.EMOTICONS.items():
+            for face in faces:
+                face = face.lower()
+                # Mirrors the analyzer's guard: only short non-alphabetic tokens
+                # that are not punctuation are looked up as emoticons
+                if not face.isalpha() and len(face) <= 5 and face not in _text.PUNCTUATION:
+                    emoticons.setdefault(face, polarity)
+        return cls(
+            words,
+            emoticons,
+            frozenset(_text.ABBREVIATIONS),
+            (_text.RE_ABBR1, _text.RE_ABBR2, _text.RE_ABBR3),
+            _text.RE_SARCASM,
+            _text.RE_EMOTICONS,
+        )
+
+    def _split_token(self, token, tokens):
+        """Split leading/trailing punctuation off `token` onto `tokens`"""
+        edges = self.token_edges
+        while token and token[0] in edges:
+            tokens.append(token[0])
+            token = token[1:]
+        tail = []
+        while token and (token[-1] in edges or token[-1] == "."):
+            if token[-1] in edges:
+                tail.append(token[-1])
+                token = token[:-1]
+            if token.endswith("..."):
+                tail.append("...")
+                token = token[:-3].rstrip(".")
+            if token.endswith("."):
+                if token in self.abbreviations or any(p.match(token) for p in self.abbreviation_patterns):
+                    break
+                tail.append(".")
+                token = token[:-1]
+        if token:
+            tokens.append(token)
+        tokens.extend(reversed(tail))
+
+    def tokenize(self, text):
+        """Lowercased words of `text`, split the way the pattern tokenizer does"""
+        text = self.CONTRACTIONS.sub(r" \1", text)
+        for quote in self.QUOTES:
+            if quote in text:
+                text = text.replace(quote, f" {quote} ")
+        text = self.LINEBREAKS.sub(" END-OF-SENTENCE ", text.replace("\r\n", "\n"))
+        edges = self.token_edges
+        tokens = []
+        for token in text.split():
+            if token[0] in edges or token[-1] in edges or token[-1] == ".":
+                self._split_token(token, tokens)
+            else:
+                tokens.append(token)
+        
+        # Group into sentences (sarcasm marks and emoticons never span one).
+        # Straight quotes always start the next sentence, as in pattern.
+        sentences, current, j = [], [], 0
+        while j < len(tokens):
+            if tokens[j] in self.SENTENCE_ENDS:
+                while j < len(tokens) and tokens[j] in self.SENTENCE_TAILS:
+                    if tokens[j] != "END-OF-SENTENCE":
+                        current.append(tokens[j])
+                    j += 1
+                sentences.append(current)
+                current = []
+            else:
+                current.append(tokens[j])
+                j += 1
+        sentences.append(current)
+        
+        words = []
+        for sentence in sentences:
+            if not sentence:
+                continue
+            sentence = " ".join(sentence)
+            if "!" in sentence:
+                sentence = self.sarcasm.sub("(!)", sentence)
+            sentence = self.emoticon_pattern.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), sentence)
+            words.extend(sentence.lower().split())
+        return words
+
+    def polarity(self, text):
+        """Average polarity of the assessed words in `text`, -1.0 to 1.0"""
+        lexicon, emoticons, negations = self.words, self.emoticons, self.NEGATIONS
+        assessments = []  # [polarity, intensity, negated]
+        modifier = negation = None
+        for word in self.tokenize(text):
+            entry = lexicon.get(word)
+            if entry is not None:
+                polarity, intensity, is_adverb = entry
+                if modifier is None:
+                    assessments.append([polarity, intensity, False])
+                else:
+                    # "really good": scale by the modifier's intensity
+                    last = assessments[-1]
+                    last[0] = max(-1.0, min(polarity * last[1], 1.0))
+                    last[1] = intensity
+                if negation is not None:
+                    last = assessments[-1]
+                    last[1] = 1.0 / last[1]
+                    last[2] = True
+                modifier = word if is_adverb else None
+                negation = word if word in negations else None
+                continue
+            if word in negations:
+                negation = word
+            elif negation and len(word.strip("'")) > 1:
+                negation = None  # negation carries across small words only ("not a good")
+            if negation is not None and modifier is not None and modifier.endswith("ly"):
+                assessments[-1][2] = True  # "really not good"
+                negation = None
+            elif modifier and len(word) > 2:
+                modifier = None
+            if word == "!" and assessments:
+                assessments[-1][0] = max(-1.0, min(assessments[-1][0] * 1.25, 1.0))
+            elif word == "(!)":
+                assessments.append([0.0, 1.0, False])  # sarcasm
+            elif word in emoticons:
+                assessments.append([emoticons[word], 1.0, False])
+        total = 0
+        for polarity, _, negated in assessments:
+            total += polarity * -0.5 if negated else polarity
+        return total / float(len(assessments) or 1)
+
+    def polarities(self, texts):
+        """Polarity of each text in `texts`, as a list"""
+        return [self.polarity(text) for text in texts]
@@ -0,0 +1,58 @@
+import pickle
+
+import pytest
+
+from blog_log import BlogLog
+
+
+def records(ids):
+    return [{"id": i, "title": f"Blog {i}"} for i in ids]
+
+
+def ids(log):
+    return sorted(record["id"] for record in log.iter_latest())
+
+
+@pytest.fixture
+def path(tmp_path):
+    log = BlogLog(tmp_path / "blogs.log")
+    log.append(records(range(1, 7)))
+    return tmp_path / "blogs.log"
+
+
+def test_append_and_reopen(path):
+    log = BlogLog(path)
+    log.append(records([7]))
+    assert ids(BlogLog(path)) == list(range(1, 8))
+
+
+def test_torn_tail_is_truncated(path):
+    size = path.stat().st_size
+    frame = BlogLog(path)._frame({"id": 7})
+    with open(path, "ab") as f:
+        f.write(frame[:len(frame) // 2])
+    log = BlogLog(path)
+    assert ids(log) == list(range(1, 7))
+    assert path.stat().st_size == size
+    log.append(records([7]))
+    assert ids(BlogLog(path)) == list(range(1, 8))
+
+
+def test_corruption_mid_file_keeps_every_intact_record(path):
+    original = path.read_bytes()
+    data = bytearray(original)
+    data[BlogLog.HEADER.size + 5] ^= 0xFF  # inside record 1's payload
+    path.write_bytes(bytes(data))
+    log = BlogLog(path)
+    assert ids(log) == [2, 3, 4, 5, 6]
+    assert (path.parent / "blogs.log.corrupt").read_bytes() == bytes(data)
+    log.append(records([7]))
+    assert ids(BlogLog(path)) == [2, 3, 4, 5, 6, 7]
+
+
+def test_legacy_pickle_is_migrated(tmp_path):
+    with open(tmp_path / "blogs.pkl", "wb") as f:
+        pickle.dump(records([1, 2]), f)
+    log = BlogLog(tmp_path / "blogs.log", legacy_path=tmp_path / "blogs.pkl")
+    assert ids(log) == [1, 2]
+    assert not (tmp_path / "blogs.tmp").exists()
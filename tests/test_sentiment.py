@@ -0,0 +1,72 @@
+import random
+
+import pytest
+from textblob import TextBlob
+
+from sentiment import SentimentLexicon
+
+# Words, punctuation and markup that exercise each rule of the pattern
+# analyzer: modifiers, negation, "!" boosts, sarcasm, emoticons,
+# abbreviations, contractions, quotes and sentence breaks
+VOCABULARY = (
+    "the market is very good but not great and really bad news for investors ! :) :-( <3 ;) (!) ( ! ) "
+    "stocks didn't rise , earnings were terrible . I'd say it's okay U.S. e.g. etc. Mr. profits... "
+    "never happy no gain extremely awful terribly nice “quoted” ‘x’ \"hi\" 'yo' ?! ... :D xD >.> "
+    "surprisingly wonderful not a bad idea really not good best worst amazing horribly dull $AAPL 10% "
+    "(excellent) [poor] {fine} *great* -- ~ok~ @user #win :/ :'( =) 8) mrs. a. X. Bros."
+).split()
+SEPARATORS = [" ", " ", " ", "\n", "\n\n", "\r\n", "  ", "\t"]
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "good",
+    "not good",
+    "not a good idea",
+    "really not good",
+    "very very good",
+    "good!",
+    "good!!!",
+    "Great (!) results",
+    "What a great quarter :) but a bad year :-(",
+    "“Excellent,” said the CFO. 'Terrible', said the market.",
+    "He didn't think it's bad.",
+    "Earnings rose 10% in the U.S. e.g. in Texas... Mr. Smith was happy.",
+    "First paragraph is wonderful.\n\nSecond one is awful.\r\n\r\nThird is fine",
+    "never happy never sad",
+    "GOOD BAD Good bAd",
+    "$AAPL @user #win ~ok~ *great* [poor] {fine} (excellent)",
+    "Bénéfice excellent, très bon résultat",
+    "निवेश अच्छा है :)",
+]
+
+
+def random_documents(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choice(VOCABULARY) + rng.choice(SEPARATORS) for _ in range(rng.randint(0, 80)))
+
+
+@pytest.fixture(scope="module")
+def lexicon():
+    return SentimentLexicon.from_pattern()
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_edge_cases_match_textblob(lexicon, text):
+    assert lexicon.polarity(text) == TextBlob(text).sentiment.polarity
+
+
+def test_random_documents_match_textblob(lexicon):
+    mismatches = [
+        (text, expected, actual)
+        for text in random_documents(2000, seed=7)
+        for expected, actual in [(TextBlob(text).sentiment.polarity, lexicon.polarity(text))]
+        if expected != actual
+    ]
+    assert not mismatches, mismatches[:5]
+
+
+def test_polarities_are_aligned_with_texts(lexicon):
+    texts = list(random_documents(50, seed=11))
+    assert lexicon.polarities(texts) == [lexicon.polarity(text) for text in texts]
@@ -0,0 +1,132 @@
+"""Cosine-similarity nearest-neighbour index over NumPy vectors, with
+brute-force search for small collections and IVF (k-means partition)
+search for large ones.
+"""
+import math
+import threading
+
+import numpy as np
+
+# IVF (inverted file) partitioning kicks in once the index is this large
+IVF_MIN_SIZE = 20_000
+IVF_NPROBE = 8  # partitions scanned per query
+IVF_TRAIN_SAMPLE = 64  # training vectors per partition
+IVF_ITERATIONS = 10
+
+
+class VectorIndex:
+    """Nearest neighbours by cosine similarity over unit vectors.
+
+    Rows are appended in place into a buffer that doubles when full. The
+    buffer, row count and IVF partitions are published together as one
+    snapshot, so searches never wait on a writer and never see partitions
+    that point past their buffer. Search is a brute-force matrix product
+    until the index holds `ivf_min` rows; from then on k-means partitions
+    (IVF) are trained, retrained whenever the index doubles, and each query
+    scans only the `nprobe` partitions closest to it.
+    """
+
+    def __init__(self, dim, ivf_min=IVF_MIN_SIZE, nprobe=IVF_NPROBE):
+        self.dim = dim
+        self.ivf_min = ivf_min
+        self.nprobe = nprobe
+        # (buffer, size, ivf); ivf is (centroids, [row ids per partition]) once trained
+        self._state = (np.zeros((64, dim), dtype=np.float32), 0, None)
+        self._trained_size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._state[1]
+
+    def add(self, vectors):
+        """Append rows (an array of shape (n, dim)); returns the first new row id"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            buffer, size, ivf = self._state
+            if size + len(vectors) > len(buffer):
+                grown = np.zeros((max(2 * len(buffer), size + len(vectors)), self.dim), dtype=np.float32)
+                grown[:size] = buffer[:size]
+                buffer = grown
+            buffer[size:size + len(vectors)] = vectors
+            total = size + len(vectors)
+            if self.ivf_min and total >= max(self.ivf_min, 2 * self._trained_size):
+                ivf = self._train(buffer, total)
+                self._trained_size = total
+            elif ivf is not None:
+                ivf = self._assign(ivf, buffer, np.arange(size, total))
+            self._state = (buffer, total, ivf)
+        return size
+
+    @staticmethod
+    def _train(buffer, size):
+        """k-means (spherical) partitions over a sample, then assign every row"""
+        partitions = max(1, int(math.sqrt(size)))
+        rng = np.random.default_rng(0)
+        sample = buffer[rng.choice(size, min(size, partitions * IVF_TRAIN_SAMPLE), replace=False)]
+        centroids = sample[rng.choice(len(sample), partitions, replace=False)]
+        for _ in range(IVF_ITERATIONS):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        nearest = np.argmax(buffer[:size] @ centroids.T, axis=1)
+        order = np.argsort(nearest, kind="stable")
+        bounds = np.searchsorted(nearest[order], np.arange(partitions + 1))
+        return centroids, [order[bounds[i]:bounds[i + 1]] for i in range(partitions)]
+
+    @staticmethod
+    def _assign(ivf, buffer, rows):
+        centroids, lists = ivf
+        nearest = np.argmax(buffer[rows] @ centroids.T, axis=1)
+        lists = list(lists)
+        for partition in np.unique(nearest):
+            lists[partition] = np.concatenate([lists[partition], rows[nearest == partition]])
+        return centroids, lists
+
+    def search(self, query, k=5):
+        """Row ids and similarities of the `k` rows nearest to `query`, best first"""
+        buffer, size, ivf = self._state
+        if size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = np.asarray(query, dtype=np.float32)
+        if ivf is None:
+            rows = None
+            scores = buffer[:size] @ query
+        else:
+            centroids, lists = ivf
+            probes = np.argsort(-(centroids @ query))[:self.nprobe]
+            rows = np.concatenate([lists[p] for p in probes])
+            scores = buffer[rows] @ query
+        k = min(k, len(scores))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return (best if rows is None else rows[best]), scores[best]
+
+
+if __name__ == "__main__":
+    # Search latency and IVF recall on clustered unit vectors: python vector_index.py [rows]
+    import sys
+    import time
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    DIM = 768
+    rng = np.random.default_rng(1)
+    topics = rng.standard_normal((1000, DIM)).astype(np.float32)
+    vectors = topics[rng.integers(0, len(topics), size)] + 0.7 * rng.standard_normal((size, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.choice(size, 100)] + 0.05 * rng.standard_normal((100, DIM)).astype(np.float32)
+
+    for label, ivf_min in [("brute force", None), ("ivf", IVF_MIN_SIZE)]:
+        index = VectorIndex(DIM, ivf_min=ivf_min)
+        start = time.perf_counter()
+        for chunk in range(0, size, 10_000):
+            index.add(vectors[chunk:chunk + 10_000])
+        built = time.perf_counter() - start
+        start = time.perf_counter()
+        found = [index.search(q, 1)[0][0] for q in queries]
+        elapsed = (time.perf_counter() - start) / len(queries) * 1000
+        hits = sum(row == np.argmax(vectors @ q) for row, q in zip(found, queries))
+        print(f"{label:12} {size} rows: built in {built:.1f}s, ~{elapsed:.2f}ms/query, recall@1 {hits}/{len(queries)}")